@@ -1,3 +1,4 @@
+import re
 from pathlib import Path
 
 
@@ -5,9 +6,12 @@ def search_and_replace_in_file(file: str, search_replace: dict, py3_exe: str):
     fp = Path(file)
     with fp.open("r") as f:
         text = f.read()
-    for s, r in search_replace.items():
-        text = text.replace(s, r)
-    return text
+    searches = sorted((s for s in search_replace if s), key=len, reverse=True)
+    if not searches:
+        return text
+    # all pairs in one pass, longer search strings win
+    pattern = re.compile("|".join(re.escape(s) for s in searches))
+    return pattern.sub(lambda m: search_replace[m.group(0)], text)
 
 
 def write_text_to_file(text:str, filepath: str):
@@ -0,0 +1,263 @@
+"""
+Persistent on-disk index of the version scenes found in a project.
+
+The catalog remembers the listing of every directory below the project
+root that can hold version scenes according to the version template,
+together with the directory's modification time. Directories that
+can not match the template (images, cache, renders...) are never entered. Adding, removing
+or renaming an entry changes the mtime of the containing directory,
+so on update only directories with a changed mtime have to be listed again.
+All other listings are taken from the catalog file.
+"""
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, Pattern, Tuple
+
+CATALOG_DIR = ".cg3"
+CATALOG_FILE = "asset_catalog.jsonl"
+CATALOG_FORMAT = 2
+
+
+class TemplateLevels:
+    """A path template split into one matcher per directory level.
+
+    For the template '${kind}/${name}/versions/${dep}/${name}_${dep}_${version}.${extension}'
+    level 0 matches the kind dirs, level 2 only the literal 'versions' and the last
+    level matches the scene files. Variables captured on an upper level are
+    matched literally on the lower levels.
+    """
+
+    def __init__(self, template: str):
+        self.levels = [self._parse(level) for level in template.split("/")]
+        self.leaf = len(self.levels) - 1
+        self._regex_cache = {}
+
+    @staticmethod
+    def _parse(level: str) -> List[Tuple[str, str]]:
+        first, *rest = level.split("${")
+        parts = [("literal", first)] if first else []
+        for part in rest:
+            var_name, literal = part.split("}", 1)
+            parts.append(("var", var_name))
+            if literal:
+                parts.append(("literal", literal))
+        return parts
+
+    def _regex(self, depth: int, values: dict) -> Pattern:
+        parts = self.levels[depth]
+        known = tuple(
+            (v, values[v]) for kind, v in parts if kind == "var" and v in values
+        )
+        key = (depth, known)
+        regex = self._regex_cache.get(key)
+        if regex is None:
+            known = dict(known)
+            seen = []
+            match_list = []
+            for kind, text in parts:
+                if kind == "literal":
+                    match_list.append(re.escape(text))
+                elif text in known:
+                    match_list.append(re.escape(known[text]))
+                elif text in seen:
+                    match_list.append(f"(?P={text})")
+                else:
+                    match_list.append(f"(?P<{text}>.*)")
+                    seen.append(text)
+            regex = self._regex_cache[key] = re.compile("".join(match_list) + "$")
+        return regex
+
+    def match(self, depth: int, name: str, values: dict) -> dict:
+        """Match a directory (or file on the last level) name at 'depth'.
+        Returns 'values' extended by the captured variables or None."""
+        match = self._regex(depth, values).match(name)
+        if match is None:
+            return None
+        return {**values, **match.groupdict()}
+
+
+@dataclass
+class CatalogChanges:
+    """Result of AssetCatalog.update(). True if the catalog changed."""
+    changed: bool = False
+    added: List[dict] = field(default_factory=list)  # scenes
+    removed: List[dict] = field(default_factory=list)
+
+    def __bool__(self):
+        return self.changed
+
+
+class AssetCatalog:
+    """Index of all scene files below 'root' matching the version template.
+
+    Usage:
+    catalog = AssetCatalog("N:/project", settings.templates["version"])
+    changes = catalog.update()  # AssetCatalog(..., workers=8) to list directories concurrently
+    print(changes.added, changes.removed)
+    for scene in catalog.scenes():
+        print(scene["kind"], scene["name"], scene["dep"], scene["version"])
+    """
+
+    def __init__(self, root: str, template: str, catalog_file: str = None,
+                 workers: int = 1):
+        self.root = Path(root)
+        self.template = template
+        self.levels = TemplateLevels(template)
+        self.workers = max(1, workers or 1)
+        self.catalog_file = (
+            Path(catalog_file) if catalog_file
+            else self.root / CATALOG_DIR / CATALOG_FILE
+        )
+        # relative dir -> {"mtime": int, "dirs": [str], "scenes": [dict]}
+        self.dirs: Dict[str, dict] = {}
+        self.listed_dirs = 0
+        self._lock = Lock()
+        self.load()
+
+    def load(self):
+        """Read the catalog file. A catalog written for another
+        template or format is ignored and will be rebuilt."""
+        self.dirs = {}
+        try:
+            with self.catalog_file.open("r", encoding="utf-8") as catalog:
+                header = json.loads(catalog.readline() or "{}")
+                if (header.get("format") != CATALOG_FORMAT or
+                        header.get("template") != self.template):
+                    return
+                for line in catalog:
+                    record = json.loads(line)
+                    self.dirs[record.pop("dir")] = record
+        except (OSError, ValueError):
+            self.dirs = {}
+
+    def save(self):
+        """Write the catalog file. The file is replaced atomically
+        so concurrent readers never see a half written catalog."""
+        tmp_file = self.catalog_file.with_name(
+            f"{self.catalog_file.name}.{os.getpid()}.tmp"
+        )
+        try:
+            with tmp_file.open("w", encoding="utf-8") as catalog:
+                catalog.write(json.dumps(
+                    {"format": CATALOG_FORMAT, "template": self.template}
+                ) + "\n")
+                for rel_dir in sorted(self.dirs):
+                    record = {"dir": rel_dir, **self.dirs[rel_dir]}
+                    catalog.write(json.dumps(record, separators=(",", ":")) + "\n")
+            os.replace(str(tmp_file), str(self.catalog_file))
+        except OSError as err:
+            print(f"Asset catalog '{self.catalog_file}' not written: {err}")
+
+    def update(self) -> CatalogChanges:
+        """Bring the catalog up to date with the filesystem.
+        Only directories whose mtime changed are listed again.
+        With more than one worker the directories of a template level
+        are listed concurrently, which pays off on high latency network shares.
+        Returns the scenes added and removed by this update. The result is
+        True if anything changed (the catalog file is saved in this case)."""
+        with self._lock:
+            return self._update()
+
+    def _update(self) -> CatalogChanges:
+        try:
+            # create it upfront, otherwise saving changes the mtime of root
+            self.catalog_file.parent.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass
+        visited = {}
+        changes = CatalogChanges()
+        self.listed_dirs = 0
+        # breadth first, one template level at a time
+        frontier = [("", 0, {})]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while frontier:
+                scan = executor.map if self.workers > 1 and len(frontier) > 1 else map
+                records = scan(lambda item: self._scan(*item), frontier)
+                next_frontier = []
+                # results come in the order of the frontier, so the merge is deterministic
+                for (rel_dir, depth, values), record in zip(frontier, records):
+                    if record is None:
+                        continue
+                    cached = self.dirs.get(rel_dir)
+                    if record is not cached:
+                        self.listed_dirs += 1
+                        self._diff(cached, record, changes)
+                    visited[rel_dir] = record
+                    for name in record["dirs"]:
+                        next_frontier.append((
+                            f"{rel_dir}/{name}" if rel_dir else name, depth + 1,
+                            self.levels.match(depth, name, values)
+                        ))
+                frontier = next_frontier
+        for rel_dir in self.dirs.keys() - visited.keys():
+            self._diff(self.dirs[rel_dir], None, changes)
+        if self.listed_dirs or visited.keys() != self.dirs.keys():
+            # replaced, never modified in place: readers hold on to the old dict
+            self.dirs = visited
+            self.save()
+            changes.changed = True
+        return changes
+
+    @staticmethod
+    def _diff(old: dict, new: dict, changes: CatalogChanges):
+        old_scenes = old["scenes"] if old else []
+        new_scenes = new["scenes"] if new else []
+        if old_scenes == new_scenes:
+            return
+        # scenes are dicts, compare their items as sets
+        old_keys = {tuple(s.items()) for s in old_scenes}
+        new_keys = {tuple(s.items()) for s in new_scenes}
+        changes.added.extend(s for s in new_scenes if tuple(s.items()) not in old_keys)
+        changes.removed.extend(s for s in old_scenes if tuple(s.items()) not in new_keys)
+
+    def _scan(self, rel_dir: str, depth: int, values: dict) -> dict:
+        """Return the (possibly cached) record of a directory or None if it is gone.
+        Above the last template level only matching subdirectories are recorded,
+        on the last level only matching files."""
+        path = self.root / rel_dir
+        try:
+            mtime = os.stat(str(path)).st_mtime_ns
+        except OSError:
+            return None
+        cached = self.dirs.get(rel_dir)
+        if cached is not None and cached["mtime"] == mtime:
+            return cached
+
+        leaf = depth == self.levels.leaf
+        dirs = []
+        scenes = []
+        try:
+            with os.scandir(str(path)) as entries:
+                for entry in entries:
+                    # DirEntry.is_dir() does not stat on Windows and
+                    # most Linux filesystems
+                    if entry.is_dir() == leaf:
+                        continue
+                    if not rel_dir and entry.name == CATALOG_DIR:
+                        continue
+                    match = self.levels.match(depth, entry.name, values)
+                    if match is None:
+                        continue
+                    if leaf:
+                        scenes.append(match)
+                    else:
+                        dirs.append(entry.name)
+        except OSError:
+            return None
+        dirs.sort()
+        scenes.sort(key=lambda s: tuple(str(v) for v in s.values()))
+        return {"mtime": mtime, "dirs": dirs, "scenes": scenes}
+
+    def scenes(self) -> Iterator[dict]:
+        """Iterate over all indexed scenes in a stable order.
+        Every scene is a dict of the template variables
+        (eg. kind, name, dep, user, version, extension).
+        Safe while update() runs in another thread."""
+        dirs = self.dirs
+        for rel_dir in sorted(dirs):
+            yield from dirs[rel_dir]["scenes"]
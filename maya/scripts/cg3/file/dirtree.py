@@ -2,11 +2,65 @@
 This module contains classes for creation of virtual directory structures.
 """
 from __future__ import annotations
+import fnmatch
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from shutil import copyfile
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from pathlib import Path
 
+from cg3.file.templating import template_engine
+
+
+@dataclass
+class CreationStep:
+    """One step of a Dirtree creation plan."""
+    action: str  # "mkdir", "copy", "write" or "touch"
+    path: Path
+    template: Path = None
+    find_replace: List[Tuple[str]] = field(default_factory=list)
+    depth: int = 0
+
+    def __str__(self):
+        if self.action == "copy":
+            return f"copy  {self.template} -> {self.path}"
+        if self.action == "write":
+            pairs = ", ".join(f"'{f}' -> '{r}'" for f, r in self.find_replace)
+            return f"write {self.template} -> {self.path} ({pairs})"
+        return f"{self.action:<5} {self.path}"
+
+    def run(self) -> None:
+        """Execute the step."""
+        if self.action == "mkdir":
+            self.path.mkdir()
+        elif self.action == "copy":
+            copyfile(str(self.template), str(self.path))
+        elif self.action == "write":
+            template_engine.render_to_file(self.template, self.path, self.find_replace)
+        else:
+            with self.path.open("w") as f:
+                f.write("")
+
+
+def run_plan(steps: List[CreationStep], workers: int = 8) -> None:
+    """Execute a creation plan.
+    Directories are created level by level, files after all directories exist.
+    Templates are read only once (see cg3.file.templating)."""
+    levels = {}
+    for step in steps:
+        if step.action == "mkdir":
+            levels.setdefault(step.depth, []).append(step)
+    file_steps = [s for s in steps if s.action != "mkdir"]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() re-raises exceptions of the workers
+        for depth in sorted(levels):
+            list(executor.map(CreationStep.run, levels[depth]))
+        list(executor.map(CreationStep.run, file_steps))
+
 
 @dataclass
 class DirtreeFile:
@@ -15,6 +69,20 @@ class DirtreeFile:
     template: str = ""
     find_replace: List[Tuple[str]] = field(default_factory=list)
 
+    def plan(self, path: Path, template_dir: Path, depth: int = 0) -> CreationStep:
+        """The step creating this file in 'path'."""
+        filepath = path / self.name
+        if self.template:
+            template_file = template_dir / self.template
+            if template_file.exists():
+                if self.find_replace:
+                    return CreationStep(
+                        "write", filepath, template_file, self.find_replace, depth
+                    )
+                return CreationStep("copy", filepath, template_file, depth=depth)
+            print(f"Template file '{template_file}' not found.")
+        return CreationStep("touch", filepath, depth=depth)
+
     def create(self, path: Path, template_dir: Path) -> None:
         """Create a real file from the virtual representation.
 
@@ -23,29 +91,9 @@ class DirtreeFile:
         :param template_dir: A directory where the file 'self.template' can be found.
         :type template_dir: Path
         """
-        filepath = path / self.name
-        if self.template:
-            template_file = template_dir / self.template
-            if template_file.exists():
-                print(f"Using '{template_file}' as template file.")
-                if self.find_replace:
-                    with template_file.open() as t_file:
-                        content = t_file.read()
-                    for find, repl in self.find_replace:
-                        content = content.replace(find, repl)
-                        print(f"Replacing '{find}' with '{repl}'")
-                    with filepath.open("w") as f_path:
-                        f_path.write(content)
-                    print(f"Writing modified template to '{filepath}'.")
-                    return
-                copyfile(str(template_file), str(filepath))
-                print(f"Copying unmodified template to '{filepath}'")
-                return
-            print(f"Template file '{template_file}' not found.")
-
-        with filepath.open("w") as f:
-            f.write("")
-        print(f"File '{filepath}' created as empty text file.")
+        step = self.plan(path, template_dir)
+        step.run()
+        print(step)
 
 
 @dataclass
@@ -55,9 +103,39 @@ class Dirtree:
     dirs: List[Dirtree] = field(default_factory=list)
     files: List[DirtreeFile] = field(default_factory=list)
 
+    def __post_init__(self):
+        # "dirs"/"files" -> [name -> child, indexed list, indexed length], see _children_index
+        self._index = {"dirs": [{}, None, -1], "files": [{}, None, -1]}
+
+    def _children_index(self, kind: str) -> Dict[str, object]:
+        """name -> child of self.dirs or self.files.
+        Rebuilt if the list was replaced or changed its length since indexing."""
+        children = getattr(self, kind)
+        index, indexed, length = self._index[kind]
+        if indexed is not children or length != len(children):
+            index = {}
+            for child in children:
+                index.setdefault(child.name, child)
+            self._index[kind] = [index, children, len(children)]
+        return index
+
+    def _child(self, kind: str, name: str):
+        child = self._children_index(kind).get(name)
+        if child is not None and child.name == name:
+            return child
+        # children may have been renamed since indexing
+        self._index[kind][2] = -1
+        return self._children_index(kind).get(name)
+
+    def _append(self, kind: str, child) -> None:
+        index = self._children_index(kind)
+        getattr(self, kind).append(child)
+        index.setdefault(child.name, child)
+        self._index[kind][2] += 1
+
     def add_new_dir(self, name: str) -> None:
         """Add a virtual subdirectory."""
-        self.dirs.append(Dirtree(name))
+        self._append("dirs", Dirtree(name))
 
     def add_new_dirs(self, dirs: List[str]) -> None:
         """Add multiple virtual subdirectories"""
@@ -66,41 +144,108 @@ class Dirtree:
 
     def add_new_file(self, name: str, template: str = "") -> None:
         """Add a virtual file."""
-        self.files.append(DirtreeFile(name, template))
+        self._append("files", DirtreeFile(name, template))
 
     def add_new_files(self, files: List[str]) -> None:
         """Add multiple virtual files."""
         for file in files:
             self.add_new_file(file)
 
-    def create(self, path: Path = Path.home(), template_dir: Path = None) -> None:
+    def plan(self, path: Path = Path.home(), template_dir: Path = None) -> List[CreationStep]:
+        """The flat list of steps creating the real directory structure in 'path'.
+        Parents always come before their content."""
+        steps = []
+        self._plan(path, template_dir, 0, steps)
+        return steps
+
+    def _plan(self, path: Path, template_dir: Path, depth: int, steps: List[CreationStep]):
+        path = path / self.name
+        steps.append(CreationStep("mkdir", path, depth=depth))
+        for file in self.files:
+            steps.append(file.plan(path, template_dir, depth + 1))
+        for directory in self.dirs:
+            directory._plan(path, template_dir, depth + 1, steps)
+
+    def create(self, path: Path = Path.home(), template_dir: Path = None,
+               dry_run: bool = False, workers: int = 8) -> List[CreationStep]:
         """Create a real diretroy structure out of the virtual one.
 
         :param path: The path where the structure will be created, defaults to Path.home()
         :type path: Path, optional
         :param template_dir: The path that contains templates for virtual files, defaults to None
         :type template_dir: Path, optional
+        :param dry_run: Only print the steps, defaults to False
+        :type dry_run: bool, optional
+        :param workers: Number of threads creating dirs and files, defaults to 8
+        :type workers: int, optional
+        :return: The executed (or planned) steps
+        :rtype: List[CreationStep]
         """
-        path = path / self.name
-        path.mkdir()
-        print(f"mkdir {path}")
-        for file in self.files:
-            file.create(path, template_dir)
-        for directory in self.dirs:
-            directory.create(path, template_dir)
+        steps = self.plan(path, template_dir)
+        if dry_run:
+            for step in steps:
+                print(step)
+            return steps
+        run_plan(steps, workers)
+        num_dirs = sum(1 for s in steps if s.action == "mkdir")
+        print(f"Created {num_dirs} dirs and {len(steps) - num_dirs} files in '{path / self.name}'.")
+        return steps
 
-    def read_from_path(self, path: Path) -> Dirtree:
+    def read_from_path(self, path: Path, max_depth: int = None,
+                       ignore: List[str] = None, workers: int = 1) -> Dirtree:
         """Read an existing directory structure and
-        create a virtual structure out of it. """
+        create a virtual structure out of it.
+
+        :param path: The directory to read.
+        :type path: Path
+        :param max_depth: Read only this many levels of subdirectories, defaults to None (all)
+        :type max_depth: int, optional
+        :param ignore: fnmatch patterns of dir and file names to skip (eg. [".git", "*.swatches"])
+        :type ignore: List[str], optional
+        :param workers: Number of threads listing directories, defaults to 1
+        :type workers: int, optional
+        """
         self.name = path.name
-        for item in path.iterdir():
-            if item.is_dir():
-                directory = Dirtree().read_from_path(item)
-                self.dirs.append(directory)
-            elif item.is_file():
-                self.add_new_file(item.name)
+        ignore_re = re.compile("|".join(fnmatch.translate(p) for p in ignore)) if ignore else None
+        level = [(self, str(path))]
+        depth = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while level and (max_depth is None or depth <= max_depth):
+                read_dirs = max_depth is None or depth < max_depth
+                next_level = []
+                for subdirs in executor.map(
+                    lambda item: item[0]._read_entries(item[1], ignore_re, read_dirs), level
+                ):
+                    next_level.extend(subdirs)
+                level = next_level
+                depth += 1
         return self
 
+    def _read_entries(self, path: str, ignore_re, read_dirs: bool) -> List[tuple]:
+        """Add the files of path. Returns (Dirtree, path) of the subdirectories to read."""
+        subdirs = []
+        with os.scandir(path) as entries:
+            # DirEntry caches the type, is_dir() and is_file() usually need no stat call
+            for entry in sorted(entries, key=lambda e: e.name):
+                if ignore_re is not None and ignore_re.match(entry.name):
+                    continue
+                if entry.is_dir():
+                    if read_dirs:
+                        directory = Dirtree(entry.name)
+                        self._append("dirs", directory)
+                        subdirs.append((directory, entry.path))
+                elif entry.is_file():
+                    self.add_new_file(entry.name)
+        return subdirs
+
+    def to_json(self, filepath: Path = None, indent: int = 4) -> str:
+        """The as_dict() structure as JSON. Also written to 'filepath' if given."""
+        text = json.dumps(self.as_dict(), indent=indent)
+        if filepath is not None:
+            with Path(filepath).open("w") as f:
+                f.write(text)
+        return text
+
     def as_dict(self) -> dict:
         """Returns a dictionary of the virtual directory structure."""
         return {
@@ -129,30 +274,24 @@ class Dirtree:
 
     def get_file(self, name: str) -> DirtreeFile:
         """Get the virtual file object called 'name' in the current Dir object."""
-        try:
-            return [f for f in self.files if f.name == name][0]
-        except IndexError:
-            raise ValueError(f"File {name} not in {self.name}") from None
+        file = self._child("files", name)
+        if file is None:
+            raise ValueError(f"File {name} not in {self.name}")
+        return file
 
     def get_dir(self, name: str) -> Dirtree:
         """Get the virtual dirtree object called 'name' in the current Dir object."""
-        directory = [d for d in self.dirs if d.name == name]
-        try:
-            return directory[0]
-        except IndexError:
-            raise ValueError(f"{self.name} contains no Dirtree named {name}") from None
-
-    def __getattribute__(self, attr):
-        try:
-            return super().__getattribute__(attr)
-        except AttributeError:
-            dirs = super().__getattribute__("dirs")
-            name = super().__getattribute__("name")
-            directory = [d for d in dirs if d.name == attr]
-            try:
-                return directory[0]
-            except IndexError:
-                raise ValueError(f"{name} contains no Dirtree named {attr}") from None
+        directory = self._child("dirs", name)
+        if directory is None:
+            raise ValueError(f"{self.name} contains no Dirtree named {name}")
+        return directory
+
+    def __getattr__(self, attr):
+        """Subdirectories as attributes (eg. tree.weekly).
+        Only called if the normal attribute lookup failed."""
+        if attr.startswith("__") and attr.endswith("__") or "_index" not in self.__dict__:
+            raise AttributeError(attr)
+        return self.get_dir(attr)
 
     def __str__(self, level=0):
         "{self.name}:"
@@ -0,0 +1,143 @@
+"""
+Materialize a file at a new location as cheap as the filesystem allows.
+
+Strategies, tried in the given order:
+  reflink   copy-on-write clone (btrfs, xfs, zfs, APFS). Instant, no extra disk
+            space, source and target are independent files afterwards.
+  hardlink  second name for the same data. Instant, but source and target
+            share their content. Only use it for files that are never
+            modified in place (eg. release history entries).
+  copy      chunked copy, reports progress.
+
+The target is always written to a temporary file next to it and renamed
+into place, so readers never see a half written file.
+A strategy that is not supported for a pair of devices is not tried again
+for them. Permission errors only skip the strategy for the current file.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Union
+
+REFLINK = "reflink"
+HARDLINK = "hardlink"
+COPY = "copy"
+DEFAULT_STRATEGIES = (REFLINK, COPY)
+IMMUTABLE_STRATEGIES = (REFLINK, HARDLINK, COPY)
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# ioctl FICLONE from linux/fs.h
+_FICLONE = 0x40049409
+# errors meaning "not supported here", not "something went wrong"
+_UNSUPPORTED = {
+    errno.EXDEV, errno.EINVAL, errno.ENOTTY,
+    errno.EOPNOTSUPP, getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    getattr(errno, "ENOSYS", errno.EOPNOTSUPP),
+}
+# errors of this one file (eg. no link permission): the next strategy
+# is tried, but the failed one is not given up for the devices
+_DENIED = {errno.EPERM, errno.EACCES}
+# (strategy, source device, target device) known to fail
+_unsupported = set()
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _reflink(source: str, target: str):
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    elif sys.platform == "darwin":
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if libc.clonefile(source.encode(), target.encode(), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), target)
+    else:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported on this platform")
+    shutil.copymode(source, target)
+
+
+def _hardlink(source: str, target: str):
+    os.link(source, target)
+
+
+def _copy(source: str, target: str, progress: ProgressCallback = None,
+          chunk_size: int = CHUNK_SIZE):
+    total = os.path.getsize(source)
+    copied = 0
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            dst.write(chunk)
+            copied += len(chunk)
+            if progress is not None:
+                progress(copied, total)
+    shutil.copymode(source, target)
+
+
+def _device(path: Path) -> int:
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+def materialize(source: Union[str, Path], target: Union[str, Path],
+                strategies: Iterable[str] = DEFAULT_STRATEGIES,
+                progress: ProgressCallback = None,
+                chunk_size: int = CHUNK_SIZE) -> str:
+    """Create target with the content of source. An existing target is replaced.
+    Returns the strategy that was used.
+
+    Usage:
+    materialize(mother_scene, asset.get_version(dep))
+    materialize(version, history_file, IMMUTABLE_STRATEGIES)
+    materialize(version, release, progress=lambda done, total: print(done, total))
+    """
+    source = str(source)
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = str(target.with_name(
+        f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    ))
+    devices = (_device(source), _device(target.parent))
+
+    for strategy in strategies:
+        if (strategy, *devices) in _unsupported:
+            continue
+        try:
+            if strategy == REFLINK:
+                _reflink(source, tmp)
+            elif strategy == HARDLINK:
+                if target.exists() and os.path.samefile(source, str(target)):
+                    return strategy  # rename() would silently keep tmp
+                _hardlink(source, tmp)
+            elif strategy == COPY:
+                _copy(source, tmp, progress, chunk_size)
+            else:
+                raise ValueError(f"Unknown materialize strategy '{strategy}'.")
+            os.replace(tmp, str(target))
+        except OSError as err:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            if strategy == COPY or err.errno not in _UNSUPPORTED | _DENIED:
+                raise
+            if err.errno in _UNSUPPORTED:
+                _unsupported.add((strategy, *devices))
+            continue
+        if strategy != COPY and progress is not None:
+            size = os.path.getsize(str(target))
+            progress(size, size)
+        return strategy
+    raise OSError(errno.EOPNOTSUPP, f"No strategy could materialize '{target}'.")
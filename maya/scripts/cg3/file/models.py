@@ -1,22 +1,60 @@
 import random
+import re
+from bisect import bisect_left, insort
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, ClassVar, Dict
 from time import time
-from string import Template
+from sys import intern
 
 from cg3.env.settings import Settings
+from cg3.file.release import ReleaseHistory
+
+def _intern(value):
+    return intern(value) if type(value) is str else value
+
 
-@dataclass
 class Scene:
-    kind: str
-    name: str
-    extension: str
-    dep: str
-    user: str = field(default="unknown")
-    timestamp: int = None
-    _version: int = None
-    comment: str = ""
+    """One version of an asset in one department.
+
+    Slotted and with interned strings, since a project easily has tens
+    of thousands of them. 'path' caches the resolved version file path.
+    """
+    __slots__ = (
+        "kind", "name", "extension", "dep", "user",
+        "timestamp", "_version", "comment", "path"
+    )
+
+    def __init__(self, kind: str, name: str, extension: str, dep: str,
+                 user: str = "unknown", timestamp: int = None,
+                 _version: int = None, comment: str = ""):
+        self.kind = _intern(kind)
+        self.name = _intern(name)
+        self.extension = _intern(extension)
+        self.dep = _intern(dep)
+        self.user = _intern(user)
+        self.timestamp = timestamp
+        self._version = _version
+        self.comment = comment
+        self.path: str = None
+
+    def _fields(self):
+        return (
+            self.kind, self.name, self.extension, self.dep, self.user,
+            self.timestamp, self._version, self.comment
+        )
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __repr__(self):
+        return (
+            f"Scene(kind={self.kind!r}, name={self.name!r}, extension={self.extension!r}, "
+            f"dep={self.dep!r}, user={self.user!r}, timestamp={self.timestamp!r}, "
+            f"_version={self._version!r}, comment={self.comment!r})"
+        )
 
     @property
     def version(self):
@@ -25,6 +63,7 @@ class Scene:
     @version.setter
     def version(self, value: int):
         self._version = value
+        self.path = None
 
     def get_version(self):
         return self._version
@@ -42,8 +81,94 @@ class Scene:
         }
 
 
+class SceneVersions:
+    """The scenes of one department indexed by their version number.
+    Behaves like the list of scenes sorted by version,
+    but lookup of a version and of the latest version is O(1)."""
+
+    def __init__(self, scenes=()):
+        self._scenes: Dict[int, Scene] = {}
+        self._versions: List[int] = []  # sorted
+        for scene in scenes:
+            self.append(scene)
+
+    def append(self, scene: Scene):
+        version = scene.get_version()
+        if version not in self._scenes:
+            if not self._versions or version > self._versions[-1]:
+                self._versions.append(version)
+            else:
+                insort(self._versions, version)
+        self._scenes[version] = scene
+
+    def remove(self, scene: Scene):
+        version = scene.get_version()
+        if self._scenes.get(version) is not scene:
+            raise ValueError(f"{scene} not in SceneVersions")
+        del self._scenes[version]
+        del self._versions[bisect_left(self._versions, version)]
+
+    def get(self, version) -> Scene:
+        return self._scenes.get(int(version))
+
+    def latest(self) -> Scene:
+        return self._scenes[self._versions[-1]] if self._versions else None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._scenes[v] for v in self._versions[index]]
+        return self._scenes[self._versions[index]]
+
+    def __iter__(self):
+        return (self._scenes[v] for v in self._versions)
+
+    def __reversed__(self):
+        return (self._scenes[v] for v in reversed(self._versions))
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __contains__(self, scene):
+        return self._scenes.get(scene.get_version()) == scene
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"SceneVersions({list(self)})"
+
+
+class PathTemplate:
+    """A string.Template precompiled to a str.format string.
+    substitute() works like Template.substitute but is a lot faster."""
+    _placeholder = re.compile(r"\$(?:\$|\{(\w+)\}|(\w+))")
+
+    def __init__(self, template: str):
+        self.template = template
+        parts = []
+        position = 0
+        for match in self._placeholder.finditer(template):
+            parts.append(self._escape(template[position:match.start()]))
+            var_name = match.group(1) or match.group(2)
+            parts.append(f"{{{var_name}}}" if var_name else "$")
+            position = match.end()
+        parts.append(self._escape(template[position:]))
+        self.format_string = "".join(parts)
+
+    @staticmethod
+    def _escape(literal: str) -> str:
+        return literal.replace("{", "{{").replace("}", "}}")
+
+    def substitute(self, mapping: dict = None, **kwargs) -> str:
+        if kwargs:
+            mapping = {**mapping, **kwargs} if mapping else kwargs
+        return self.format_string.format_map(mapping)
+
+
 class AssetMeta(type):
     def __init__(cls, *args, **kwargs):
+        # bumped on every settings change, invalidates all cached paths
+        cls._generation = 0
         cls._settings = None
         cls._user_settings = None
         cls._release_name_template = None
@@ -52,6 +177,7 @@ class AssetMeta(type):
         cls._version_path_template = None
         cls._release_history_name_template = None
         cls._release_history_path_template = None
+        cls._thumbnail_template = None
 
     @property
     def settings(cls):
@@ -60,16 +186,19 @@ class AssetMeta(type):
     @settings.setter
     def settings(cls, s):
         cls._settings = s
+        cls._generation += 1
         path_list = cls._settings.templates.get("release").split("/")
-        cls._release_name_template = Template(path_list.pop(-1))
-        cls._release_path_template = Template("/".join(path_list))
+        cls._release_name_template = PathTemplate(path_list.pop(-1))
+        cls._release_path_template = PathTemplate("/".join(path_list))
         path_list = cls._settings.templates.get("version").split("/")
-        cls._version_name_template = Template(path_list.pop(-1))
-        cls._version_path_template = Template("/".join(path_list))
+        cls._version_name_template = PathTemplate(path_list.pop(-1))
+        cls._version_path_template = PathTemplate("/".join(path_list))
         path_list = cls._settings.templates.get("release_history").split("/")
-        cls._release_history_name_template = Template(path_list.pop(-1))
-        cls._release_history_path_template = Template("/".join(path_list))
-    
+        cls._release_history_name_template = PathTemplate(path_list.pop(-1))
+        cls._release_history_path_template = PathTemplate("/".join(path_list))
+        thumbnail = cls._settings.templates.get("thumbnail")
+        cls._thumbnail_template = PathTemplate(thumbnail) if thumbnail else None
+
     @property
     def user_settings(cls):
         return cls._user_settings
@@ -77,6 +206,7 @@ class AssetMeta(type):
     @user_settings.setter
     def user_settings(cls, us):
         cls._user_settings = us
+        cls._generation += 1
 
 
 @dataclass
@@ -84,21 +214,44 @@ class Asset(metaclass=AssetMeta):
     kind: str
     name: str
     extension: str
-    deps: Dict[str, Scene] = field(default_factory=dict)
+    deps: Dict[str, SceneVersions] = field(default_factory=dict)
     release_history: Dict[str, Scene] = field(default_factory=dict)
 
     def __post_init__(self):
         self.base_dir = Asset.user_settings.local_project_location
+        # resolved paths, see _cached_path
+        self._paths = {}
+        self._paths_generation = Asset._generation
 
+        self.deps = {dep: SceneVersions(scenes) for dep, scenes in self.deps.items()}
         if not self.deps:
             start_dep = Asset.settings.kinds.get(self.kind).get(
                 "start_dep", Asset.settings.default_start_dep
             )
-            self.deps[start_dep] = []
+            self.deps[start_dep] = SceneVersions()
 
     def __lt__(self, other):
         return self.name < other.name
 
+    def _cached_path(self, key: tuple, resolve):
+        """Return the path cached under key or cache the result of resolve().
+        The cache is dropped when the settings change."""
+        if self._paths_generation != Asset._generation:
+            self.invalidate_paths()
+        try:
+            return self._paths[key]
+        except KeyError:
+            path = self._paths[key] = resolve()
+            return path
+
+    def invalidate_paths(self):
+        self.base_dir = Asset.user_settings.local_project_location
+        self._paths = {}
+        self._paths_generation = Asset._generation
+        for scenes in self.deps.values():
+            for scene in scenes:
+                scene.path = None
+
     def create_folders(self):
         for dep in self.get_deps():
             self.get_version(dep).parent.mkdir(parents=True, exist_ok=True)
@@ -107,11 +260,10 @@ class Asset(metaclass=AssetMeta):
 
     def new_version(self, dep: str, user:str="unknown", comment:str=""):
         if not dep in self.deps:
-            self.deps[dep] = []
-        try:
-            version = self.deps[dep][-1].get_version()
-        except IndexError:
-            version = 0
+            self.deps[dep] = SceneVersions()
+        latest = self.deps[dep].latest()
+        version = latest.get_version() if latest else 0
+        self._paths.pop(("version", dep, "latest"), None)
         self.deps[dep].append(
             Scene(self.kind, self.name, self.extension,
                   dep, user, int(time()), version + 1, comment)
@@ -119,7 +271,8 @@ class Asset(metaclass=AssetMeta):
 
     def add_version_scene(self, dep: str, user: str, version: str, timestamp: str=None, comment: str=""):
         if not self.deps.get(dep, False):
-            self.deps[dep] = []
+            self.deps[dep] = SceneVersions()
+        self._paths.pop(("version", dep, "latest"), None)
         self.deps[dep].append(
             Scene(
                 self.kind, self.name, self.extension,
@@ -127,21 +280,28 @@ class Asset(metaclass=AssetMeta):
             )
         )
 
+    def remove_version_scene(self, dep: str, version: str):
+        scene = self.get_version_scene(dep, version)
+        if scene is not None:
+            self.deps[dep].remove(scene)
+            self._paths.pop(("version", dep, "latest"), None)
+            self._paths.pop(("version", dep, scene.version), None)
+        return scene
+
     def get_max_version_scene(self, dep: str):
-        try:
-            return max(self.deps[dep], key=lambda s: s.version)
-        except ValueError:
-            return None
+        return self.deps[dep].latest()
 
     def get_version_scene(self, dep: str, version: str):
         try:
-            version = int(version)
-            scenes = [s for s in self.deps[dep] if s.get_version() == version]
-            return scenes[0]
-        except IndexError:
+            return self.deps[dep].get(version)
+        except KeyError:
             return None
 
-    def get_version(self, dep:str, version: str="latest") -> Scene:
+    def get_version(self, dep:str, version: str="latest") -> Path:
+        key = ("version", dep, version if version == "latest" else str(version).zfill(4))
+        path = self._paths.get(key)
+        if path is not None and self._paths_generation == Asset._generation:
+            return path
         if version == "latest":
             scene = self.get_max_version_scene(dep)
         else:
@@ -149,30 +309,67 @@ class Asset(metaclass=AssetMeta):
         if scene is None:
             print(f"Version {version} not found for {self.kind} '{self.name}' in department '{dep}'.")
             return None
-        path = self._version_path_template.substitute(scene.as_dict())
-        name = self._version_name_template.substitute(scene.as_dict())
-        return Path(self.base_dir) / path / name
+        return self._cached_path(key, lambda: Path(self._scene_path(scene)))
+
+    def _scene_path(self, scene: Scene) -> str:
+        if scene.path is None:
+            scene_dict = scene.as_dict()
+            path = self._version_path_template.substitute(scene_dict)
+            name = self._version_name_template.substitute(scene_dict)
+            scene.path = f"{self.base_dir}/{path}/{name}"
+        return scene.path
 
     def get_release_path(self, dep: str) -> Path:
-        return Path(self.base_dir) / self._release_path_template.substitute(
-            kind=self.kind, name=self.name, dep=dep
+        return self._cached_path(
+            ("release_path", dep),
+            lambda: Path(self.base_dir) / self._release_path_template.substitute(
+                kind=self.kind, name=self.name, dep=dep
+            )
         )
 
     def get_release_name(self, dep: str) -> str:
-        return self._release_name_template.substitute(
-            kind=self.kind, name=self.name, dep=dep, extension=self.extension
+        return self._cached_path(
+            ("release_name", dep),
+            lambda: self._release_name_template.substitute(
+                kind=self.kind, name=self.name, dep=dep, extension=self.extension
+            )
         )
 
     def get_release(self, dep: str) -> Path:
-        return  self.get_release_path(dep) / self.get_release_name(dep)
+        return self._cached_path(
+            ("release", dep),
+            lambda: self.get_release_path(dep) / self.get_release_name(dep)
+        )
 
     def get_release_history_path(self, dep: str) -> Path:
-        return Path(self.base_dir) / self._release_history_path_template.substitute(
-            kind=self.kind, name=self.name, dep=dep, extension=self.extension
+        return self._cached_path(
+            ("release_history_path", dep),
+            lambda: Path(self.base_dir) / self._release_history_path_template.substitute(
+                kind=self.kind, name=self.name, dep=dep, extension=self.extension
+            )
+        )
+
+    def get_thumbnail(self) -> Path:
+        """Path of the thumbnail image or None if the project has no thumbnail template."""
+        if self._thumbnail_template is None:
+            return None
+        return self._cached_path(
+            ("thumbnail",),
+            lambda: Path(self.base_dir) / self._thumbnail_template.substitute(
+                kind=self.kind, name=self.name
+            )
+        )
+
+    def get_release_history_name(self, dep: str, timestamp: int) -> str:
+        return self._release_history_name_template.substitute(
+            kind=self.kind, name=self.name, dep=dep,
+            extension=self.extension, timestamp=timestamp
         )
 
     def get_release_history(self, dep: str) -> List[Path]:
-        pass
+        """Files of all releases of dep, oldest first. Read from the release index."""
+        history = ReleaseHistory(self.get_release_history_path(dep))
+        return [history.path(entry) for entry in history.entries(dep)]
 
     def get_deps(self):
         return list(self.deps.keys())
@@ -184,3 +381,29 @@ class Asset(metaclass=AssetMeta):
 
     def list_versions(self, dep):
         return self.deps.get(dep, None)
+
+    def as_dict(self):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "extension": self.extension,
+            "deps": {
+                dep: [
+                    {
+                        "user": s.user, "timestamp": s.timestamp,
+                        "version": s.version, "comment": s.comment
+                    } for s in scenes
+                ] for dep, scenes in self.deps.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, asset_dict: dict):
+        asset = cls(asset_dict["kind"], asset_dict["name"], asset_dict["extension"])
+        for dep, scenes in asset_dict["deps"].items():
+            asset.deps.setdefault(dep, SceneVersions())
+            for s in scenes:
+                asset.add_version_scene(
+                    dep, s["user"], s["version"], s["timestamp"], s["comment"]
+                )
+        return asset
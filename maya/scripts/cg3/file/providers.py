@@ -1,14 +1,27 @@
 from oauth2client.service_account import ServiceAccountCredentials
 import gspread
+from gspread.utils import rowcol_to_a1
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Callable, List
 from pathlib import Path
-import re
-
-from cg3.file.models import Asset
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from maya.utils import executeDeferred
+
+from cg3.file.models import Asset, Scene, SceneVersions
+from cg3.file.catalog import AssetCatalog
+from cg3.file.watcher import AssetWatcher
 from cg3.env.settings import get_project_settings, get_user_settings
+from cg3.env.vars import getenv
 from cg3.event import cg3event
 
+logger = logging.getLogger(__name__)
+
 
 class AssetProvider(ABC):
     settings = None
@@ -28,6 +41,18 @@ class AssetProvider(ABC):
     def on_asset_created(self, asset:Asset):
         """Do whatever is necessary if new Asset is created"""
 
+    def on_assets_created(self, assets: List[Asset]):
+        """Do whatever is necessary if many Assets are created at once.
+        Providers talking to a backend should override this to batch the writes."""
+        for asset in assets:
+            self.on_asset_created(asset)
+
+    def start_watching(self):
+        """Start keeping the asset list live (if the provider supports it)."""
+
+    def stop_watching(self):
+        """Stop keeping the asset list live."""
+
 
 class MockAssetProvider(AssetProvider):
     def __init__(self, settings=None):
@@ -63,10 +88,19 @@ class MockAssetProvider(AssetProvider):
 
 
 class FilesystemAssetProvider(AssetProvider):
-    def __init__(self, settings=None):
+    def __init__(self, settings=None, catalog_file: str=None, workers: int=None):
         Asset.settings = self.settings = settings or get_project_settings()
         Asset.user_settings = self.user_settings = get_user_settings()
 
+        # concurrent directory listing only makes sense on network shares
+        if workers is None:
+            workers = self.user_settings.get("scan_workers", 1)
+        self.catalog = AssetCatalog(
+            Asset.user_settings.local_project_location,
+            Asset.settings.templates["version"],
+            catalog_file, workers
+        )
+        self.watcher = None
         self.assets = {}
         self.reload_asset_list()
 
@@ -74,40 +108,57 @@ class FilesystemAssetProvider(AssetProvider):
         self.assets[asset.name] = asset
 
     def reload_asset_list(self):
-        match_string = Asset.user_settings.local_project_location
-        match_string += "/" + Asset.settings.templates["version"]
-        match_string = match_string.replace(".", "\.")
-        first, *rest = match_string.split("${")
-
-        # create a regex matchstring out of the template string
-        var_name_seen = []
-        match_list = [first]
-        for part in rest:
-            var_name, x = part.split("}")
-            # search for a variable only once
-            if var_name not in var_name_seen:
-                match_list.append(f"(?P<{var_name}>.*){x}")
-                var_name_seen.append(var_name)
-            else:
-                match_list.append(f".*{x}" if match_list[-1] != ".*" else x)
-                
-        match_string = "".join(match_list)
-        regex = re.compile(match_string)
-
-        # go throug all scene files with matching extension and match against match_string
-        for full_path in Path(Asset.user_settings.local_project_location).rglob(f"*.*"):
-            match = regex.match(str(full_path).replace("\\","/"))
-            if match:
-                groupdict = match.groupdict()
-                asset = self.assets.get(groupdict["name"], None)
-                if asset is None:
-                    self.assets[groupdict["name"]] = Asset(
-                        groupdict["kind"], groupdict["name"], groupdict["extension"]
-                    )
-                self.assets[groupdict["name"]].add_version_scene(
-                    groupdict["dep"], groupdict["user"], 
-                    groupdict["version"], groupdict.get("timestamp", None)
-                )
+        # only directories changed since the last scan are listed again
+        self.catalog.update()
+
+        self.assets = {}
+        for groupdict in self.catalog.scenes():
+            self.add_scene(groupdict)
+
+    def add_scene(self, groupdict: dict) -> Asset:
+        """Add a scene found by the catalog. Creates the asset if necessary."""
+        asset = self.assets.get(groupdict["name"], None)
+        if asset is None:
+            asset = self.assets[groupdict["name"]] = Asset(
+                groupdict["kind"], groupdict["name"], groupdict["extension"]
+            )
+        asset.add_version_scene(
+            groupdict["dep"], groupdict["user"],
+            groupdict["version"], groupdict.get("timestamp", None)
+        )
+        return asset
+
+    def apply_catalog_changes(self, added: List[dict], removed: List[dict]):
+        """Apply scenes added to and removed from the catalog.
+        Returns lists of the created assets and of the assets
+        with saved and with removed versions."""
+        created, saved, deleted = [], [], []
+        for groupdict in removed:
+            asset = self.assets.get(groupdict["name"], None)
+            if asset is None:
+                continue
+            asset.remove_version_scene(groupdict["dep"], groupdict["version"])
+            if asset not in deleted:
+                deleted.append(asset)
+        for groupdict in added:
+            is_new = groupdict["name"] not in self.assets
+            asset = self.add_scene(groupdict)
+            if is_new:
+                created.append(asset)
+            elif asset not in saved:
+                saved.append(asset)
+        return created, saved, deleted
+
+    def start_watching(self, interval: float=5.0):
+        """Keep self.assets up to date with changes made by other users."""
+        if self.watcher is None:
+            self.watcher = AssetWatcher(self, interval)
+            self.watcher.start()
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
 
     def get(self, name:str) -> Asset:
         return self.assets.get(name, None)
@@ -117,52 +168,95 @@ class FilesystemAssetProvider(AssetProvider):
 
 
 class GoogleSheetsAssetProvider(AssetProvider):
-    def __init__(self, auth_json: str, sheet_name: str, settings=None):
-        Asset.settings = self.settings = settings or get_project_settings()
-        Asset.user_settings = self.user_settings = get_user_settings()
+    """Assets stored as rows of a Google Sheet.
 
-        scope = ['https://spreadsheets.google.com/feeds',
-                 'https://www.googleapis.com/auth/drive']
-        creds = ServiceAccountCredentials.from_json_keyfile_name(auth_json, scope)
-        client = gspread.authorize(creds)
+    Every asset has one row holding name, kind and status
+    and one row per version holding name, dep, version, comment, user and timestamp.
+    Rows are only ever appended, so after the first full load only rows
+    appended since the last sync are pulled.
 
-        self.asset_sheet = client.open(sheet_name).sheet1
+    'worksheet' can be any object providing the used gspread Worksheet methods
+    (get_all_values, get, append_rows), in which case no authorization happens.
+    """
+    def __init__(self, auth_json: str=None, sheet_name: str=None, settings=None, worksheet=None):
+        Asset.settings = self.settings = settings or get_project_settings()
+        Asset.user_settings = self.user_settings = get_user_settings()
 
+        if worksheet is None:
+            scope = ['https://spreadsheets.google.com/feeds',
+                     'https://www.googleapis.com/auth/drive']
+            creds = ServiceAccountCredentials.from_json_keyfile_name(auth_json, scope)
+            client = gspread.authorize(creds)
+            worksheet = client.open(sheet_name).sheet1
+        self.asset_sheet = worksheet
+
+        # local copy of the sheet (without header), padded to the header length
+        self.header = []
+        self.rows = []
         self.assets = {}
         self.reload_asset_list()
 
     def sort_asset_sheet(self):
         # sort by asset, kind, dep, version
-        # so the reload_asset_list method will work correct
+        # sorting reorders the rows, so the next reload will be a full one
         self.asset_sheet.sort(
             (1, "asc"), (2, "asc"), (4, "asc"), (5, "asc")
         )
+        self.rows = []
 
     def reload_asset_list(self):
-        self.sort_asset_sheet()
-        results = self.asset_sheet.get_all_records()
-
-        current_asset_name = None
-        #current_dep = None
-
-        for result in results:
-            asset_name = result["asset"]
-            if current_asset_name != asset_name:
-                current_asset_name = result["asset"]
-                self.assets[current_asset_name] = Asset(
-                    result["kind"], current_asset_name, result["extension"]
-                )
-                #current_dep = None
-            else:
-                dep = result["dep"]
-                user = result["user"]
-                version = str(result["version"]).zfill(4)
-                timestamp = str(result["timestamp"])
-                comment = result["comment"]
-                self.assets[current_asset_name].add_version_scene(
-                    dep, user, version, timestamp, comment
+        """Sync with the sheet.
+        The last known row is pulled together with all rows after it.
+        If it still matches, only the new rows are applied.
+        Otherwise the sheet was edited and is loaded completely."""
+        if not self.rows:
+            self.full_reload()
+            return
+        first_row = len(self.rows) + 1  # +1 for the header
+        values = [self._pad(r) for r in self.asset_sheet.get(f"A{first_row}:{self._last_column()}")]
+        if not values or values[0] != self.rows[-1]:
+            self.full_reload()
+            return
+        self._apply_rows(values[1:])
+
+    def full_reload(self):
+        header, *rows = self.asset_sheet.get_all_values() or [[]]
+        self.header = header
+        self.rows = []
+        self.assets = {}
+        self._apply_rows([self._pad(r) for r in rows])
+
+    def _last_column(self) -> str:
+        # "A1" -> "A", "AB1" -> "AB"
+        return rowcol_to_a1(1, max(len(self.header), 1))[:-1]
+
+    def _pad(self, row: list) -> list:
+        row = ["" if v is None else str(v) for v in row[:len(self.header)]]
+        return row + [""] * (len(self.header) - len(row))
+
+    def _apply_rows(self, rows: List[list]):
+        """Add rows to the row cache and to self.assets.
+        The order of the rows doesn't matter: version rows of
+        an asset may come before the asset row."""
+        self.rows.extend(rows)
+        records = [dict(zip(self.header, row)) for row in rows]
+        for record in records:
+            if record["kind"] and record["asset"] not in self.assets:
+                self.assets[record["asset"]] = Asset(
+                    record["kind"], record["asset"], record["extension"]
                 )
-    
+        for record in records:
+            if record["kind"] or not record["dep"]:
+                continue
+            asset = self.assets.get(record["asset"], None)
+            if asset is None:
+                print(f"Version row for unknown asset '{record['asset']}' ignored.")
+                continue
+            asset.add_version_scene(
+                record["dep"], record["user"], record["version"],
+                record["timestamp"], record["comment"]
+            )
+
     def get(self, name: str) -> Asset:
         return self.assets.get(name, None)
 
@@ -171,20 +265,348 @@ class GoogleSheetsAssetProvider(AssetProvider):
 
     def on_asset_created(self, asset):
         """On creation add two rows.
-        Fist one for the asset "idea", 
-        the second for the first created file."""
-        self.assets[asset.name] = asset
+        Fist one for the asset "idea",
+        the second for the first created file.
+        Both rows are written with one request."""
+        self.on_assets_created([asset])
+
+    def on_assets_created(self, assets):
+        """All rows of all assets are written with one request.
+        The assets are only added if the request succeeded."""
+        self.asset_sheet.append_rows(
+            [row for asset in assets for row in self._asset_rows(asset)]
+        )
+        for asset in assets:
+            self.assets[asset.name] = asset
+        self.reload_asset_list()
+
+    def _asset_rows(self, asset) -> List[tuple]:
         start_dep = asset.get_start_dep()
         scene = asset.get_max_version_scene(start_dep)
-        self.asset_sheet.append_row((
-            asset.name, asset.kind, "WIP",
-            None, None,None, None, None, scene.extension
-        ))
-        self.asset_sheet.append_row((
-            asset.name, None, None,
-            start_dep, 1, "Initial Save",
-            scene.user, scene.timestamp, scene.extension
+        return [
+            (
+                asset.name, asset.kind, "WIP",
+                None, None, None, None, None, scene.extension
+            ),
+            (
+                asset.name, None, None,
+                start_dep, 1, "Initial Save",
+                scene.user, scene.timestamp, scene.extension
+            )
+        ]
+
+
+class CachedAssetProvider(AssetProvider):
+    """Offline first wrapper around another (slow or remote) AssetProvider.
+
+    The assets are served immediately from a local snapshot file.
+    Every project has its own snapshot (named by a hash of the project).
+    The backing provider is created and refreshed in one long lived
+    background thread. Refreshes requested while one is running are
+    merged into a single follow-up refresh.
+    Created assets are queued (write-behind) and handed to the backing provider
+    as soon as it is reachable. While assets are queued, failed refreshes
+    are retried with a growing delay (retry_delay up to max_retry_delay).
+    The queue is part of the snapshot, so it survives a restart of Maya.
+    The backing provider only ever gets copies of the assets,
+    the assets served to the UI are never touched by the background thread.
+
+    When a refresh finished, 'asset_list_reloaded' is posted in the main thread,
+    when it failed 'asset_sync_failed' (with the error).
+
+    Usage:
+    provider = CachedAssetProvider(
+        lambda: GoogleSheetsAssetProvider("auth.json", "assets")
+    )
+    """
+    retry_delay = 5.0
+    max_retry_delay = 300.0
+
+    def __init__(self, provider_factory: Callable[[], AssetProvider],
+                 snapshot_file: str=None, settings=None):
+        Asset.settings = self.settings = settings or get_project_settings()
+        Asset.user_settings = self.user_settings = get_user_settings()
+
+        self.provider_factory = provider_factory
+        self.backend = None
+        self.snapshot_file = Path(snapshot_file or self.default_snapshot_file())
+        self.assets = {}
+        self.pending: List[Asset] = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()  # a refresh was requested
+        self._idle = threading.Event()  # no refresh requested or running
+        self._idle.set()
+
+        self.load_snapshot()
+        self.reload_asset_list()
+
+    def default_snapshot_file(self) -> str:
+        """Snapshot file of the current project in MAYA_APP_DIR."""
+        project = "|".join(str(p) for p in (
+            self.user_settings.get("project_settings", ""),
+            self.user_settings.get("local_project_location", "")
         ))
+        key = hashlib.sha1(project.encode("utf-8")).hexdigest()[:16]
+        return f"{getenv('MAYA_APP_DIR')}/cg3_asset_snapshots/{key}.json"
+
+    def load_snapshot(self):
+        try:
+            snapshot = json.loads(self.snapshot_file.read_text())
+        except (OSError, ValueError):
+            return
+        self.assets = {
+            a["name"]: Asset.from_dict(a) for a in snapshot.get("assets", [])
+        }
+        self.pending = [Asset.from_dict(a) for a in snapshot.get("pending", [])]
+        for asset in self.pending:
+            self.assets[asset.name] = asset
+
+    def save_snapshot(self):
+        with self._lock:
+            snapshot = {
+                "assets": [a.as_dict() for a in self.assets.values()],
+                "pending": [a.as_dict() for a in self.pending]
+            }
+        tmp_file = self.snapshot_file.with_name(f"{self.snapshot_file.name}.tmp")
+        try:
+            self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file.write_text(json.dumps(snapshot))
+            os.replace(str(tmp_file), str(self.snapshot_file))
+        except OSError as err:
+            print(f"Asset snapshot '{self.snapshot_file}' not written: {err}")
+
+    def get(self, name: str) -> Asset:
+        return self.assets.get(name, None)
+
+    def list_assets(self) -> List[Asset]:
+        return sorted(self.assets.values())
+
+    def reload_asset_list(self):
+        """Request a refresh from the backing provider. Does not block."""
+        with self._lock:
+            self._idle.clear()
+            self._wake.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="CachedAssetProvider")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def wait_for_sync(self, timeout: float = None) -> bool:
+        """Block until all requested refreshes are done. False on timeout."""
+        return self._idle.wait(timeout)
+
+    def on_asset_created(self, asset: Asset):
+        self.on_assets_created([asset])
+
+    def on_assets_created(self, assets: List[Asset]):
+        for asset in assets:
+            self.assets[asset.name] = asset
+        with self._lock:
+            self.pending.extend(assets)
+        self.save_snapshot()
         self.reload_asset_list()
-        
 
+    def _run(self):
+        """The background thread. Only this thread talks to the backend.
+        Sleeps until a refresh is requested or, while assets are
+        queued, until the next retry is due."""
+        delay = None
+        while True:
+            self._wake.wait(delay)
+            self._wake.clear()
+            self._sync()
+            with self._lock:
+                if not self._wake.is_set():
+                    self._idle.set()
+                queued = bool(self.pending)
+            if not queued:
+                delay = None
+            elif delay is None:
+                delay = self.retry_delay
+            else:
+                delay = min(delay * 2, self.max_retry_delay)
+
+    def _sync(self):
+        try:
+            if self.backend is None:
+                self.backend = self.provider_factory()
+            else:
+                self.backend.reload_asset_list()
+            self._replay_pending()
+            assets = {
+                a.name: Asset.from_dict(a.as_dict()) for a in self.backend.list_assets()
+            }
+        except Exception as err:  # network errors come in many flavours
+            logger.warning("Asset backend not reachable, using snapshot: %s", err)
+            executeDeferred(cg3event.post, "asset_sync_failed", self, err)
+            return
+        executeDeferred(self._refreshed, assets)
+
+    def _replay_pending(self):
+        with self._lock:
+            assets = list(self.pending)
+        if not assets:
+            return
+        # an earlier replay may have written the assets and failed afterwards
+        known = {a.name for a in self.backend.list_assets()}
+        new = [Asset.from_dict(a.as_dict()) for a in assets if a.name not in known]
+        if new:
+            self.backend.on_assets_created(new)
+        with self._lock:
+            self.pending = [a for a in self.pending if a not in assets]
+
+    def _refreshed(self, assets: dict):
+        """Runs in the main thread."""
+        with self._lock:
+            for asset in self.pending:
+                assets.setdefault(asset.name, asset)
+        self.assets = assets
+        self.save_snapshot()
+        cg3event.post("asset_list_reloaded", self)
+
+
+class SqliteAssetProvider(AssetProvider):
+    """Assets stored in a SQLite database, eg. next to the project on the share.
+
+    Lookups by name and the latest version per department are index lookups.
+    The database runs in WAL mode, so readers in several Maya sessions
+    don't block each other or a writer. Note that WAL needs shared memory:
+    all sessions have to access the file through the same host. For a database
+    served from a plain SMB/NFS share pass journal_mode="DELETE".
+    The connection may be used from any thread (eg. by CachedAssetProvider),
+    all access to it is serialized by a lock.
+
+    Usage:
+    provider = SqliteAssetProvider("N:/project/assets.db")
+    provider.import_assets(FilesystemAssetProvider().list_assets())
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS assets (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            kind TEXT NOT NULL,
+            extension TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS assets_kind ON assets (kind);
+        CREATE TABLE IF NOT EXISTS deps (
+            id INTEGER PRIMARY KEY,
+            asset_id INTEGER NOT NULL REFERENCES assets (id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            UNIQUE (asset_id, name)
+        );
+        CREATE TABLE IF NOT EXISTS versions (
+            dep_id INTEGER NOT NULL REFERENCES deps (id) ON DELETE CASCADE,
+            version INTEGER NOT NULL,
+            user TEXT,
+            timestamp INTEGER,
+            comment TEXT,
+            PRIMARY KEY (dep_id, version)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, database: str, settings=None, journal_mode: str="WAL"):
+        Asset.settings = self.settings = settings or get_project_settings()
+        Asset.user_settings = self.user_settings = get_user_settings()
+
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(database, timeout=30, check_same_thread=False)
+        with self._lock:
+            self.connection.execute(f"PRAGMA journal_mode={journal_mode}")
+            self.connection.execute("PRAGMA foreign_keys=ON")
+            with self.connection:
+                self.connection.executescript(self.SCHEMA)
+
+    def _fetch(self, query: str, parameters=()) -> list:
+        with self._lock:
+            return self.connection.execute(query, parameters).fetchall()
+
+    def get(self, name: str) -> Asset:
+        rows = self._fetch(
+            """SELECT a.kind, a.name, a.extension, d.name,
+                      v.version, v.user, v.timestamp, v.comment
+               FROM assets a
+               LEFT JOIN deps d ON d.asset_id = a.id
+               LEFT JOIN versions v ON v.dep_id = d.id
+               WHERE a.name = ?
+               ORDER BY d.id, v.version""", (name,)
+        )
+        assets = self._assets_from_rows(rows)
+        return assets[0] if assets else None
+
+    def list_assets(self) -> List[Asset]:
+        rows = self._fetch(
+            """SELECT a.kind, a.name, a.extension, d.name,
+                      v.version, v.user, v.timestamp, v.comment
+               FROM assets a
+               LEFT JOIN deps d ON d.asset_id = a.id
+               LEFT JOIN versions v ON v.dep_id = d.id
+               ORDER BY a.name, d.id, v.version"""
+        )
+        return self._assets_from_rows(rows)
+
+    def latest_versions(self, name: str) -> dict:
+        """Return {dep: Scene} with the latest version of every department of an asset."""
+        rows = self._fetch(
+            """SELECT a.kind, a.name, a.extension, d.name,
+                      v.version, v.user, v.timestamp, v.comment
+               FROM assets a
+               JOIN deps d ON d.asset_id = a.id
+               JOIN versions v ON v.dep_id = d.id
+               WHERE a.name = ? AND v.version = (
+                   SELECT MAX(version) FROM versions WHERE dep_id = d.id
+               )""", (name,)
+        )
+        return {
+            dep: Scene(kind, name, extension, dep, user, timestamp, version, comment or "")
+            for kind, name, extension, dep, version, user, timestamp, comment in rows
+        }
+
+    @staticmethod
+    def _assets_from_rows(rows) -> List[Asset]:
+        assets = {}
+        for kind, name, extension, dep, version, user, timestamp, comment in rows:
+            asset = assets.get(name)
+            if asset is None:
+                asset = assets[name] = Asset(kind, name, extension)
+            if dep is None:
+                continue
+            if version is None:
+                asset.deps.setdefault(dep, SceneVersions())
+            else:
+                asset.add_version_scene(dep, user, version, timestamp, comment or "")
+        return list(assets.values())
+
+    def reload_asset_list(self):
+        """Nothing to do, every query reads the current state of the database."""
+
+    def on_asset_created(self, asset: Asset):
+        self.import_assets([asset])
+
+    def on_assets_created(self, assets: List[Asset]):
+        self.import_assets(assets)
+
+    def import_assets(self, assets: List[Asset]):
+        """Insert or update assets including all departments and versions.
+        Everything is written in one transaction."""
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO assets (name, kind, extension) VALUES (?, ?, ?)",
+                ((a.name, a.kind, a.extension) for a in assets)
+            )
+            self.connection.executemany(
+                """INSERT OR IGNORE INTO deps (asset_id, name)
+                   SELECT id, ? FROM assets WHERE name = ?""",
+                ((dep, a.name) for a in assets for dep in a.get_deps())
+            )
+            self.connection.executemany(
+                """INSERT OR REPLACE INTO versions
+                       (dep_id, version, user, timestamp, comment)
+                   SELECT d.id, ?, ?, ?, ? FROM deps d
+                   JOIN assets a ON a.id = d.asset_id
+                   WHERE a.name = ? AND d.name = ?""",
+                (
+                    (s.get_version(), s.user, s.timestamp, s.comment, a.name, dep)
+                    for a in assets for dep, scenes in a.deps.items() for s in scenes
+                )
+            )
@@ -1,34 +1,103 @@
 from pathlib import Path
-import shutil
 from typing import List
 from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from string import ascii_letters
 import PySide2.QtCore as qc
 import PySide2.QtWidgets as qw
-import PySide2.QtGui as qg
 
 from maya.app.general.mayaMixin import MayaQWidgetDockableMixin
 
 from cg3.ui.windows import maya_main_window
 from cg3.ui.widgets import QHLine
+from cg3.ui.thumbnails import ThumbnailCache, ThumbnailDelegate, THUMBNAIL_ROLE
 from cg3.env.settings import get_project_settings, get_user_settings
 from cg3.file.models import Asset
+from cg3.file.search import AssetSearchIndex
+from cg3.file.materialize import materialize
 
 from cg3.event import cg3event
 
 
+class AssetTableModel(qc.QAbstractTableModel):
+    """Table of assets without per row item objects.
+    The model only holds the names of the current rows. Everything
+    else is read from the assets dict when a (visible) cell is painted.
+    Filtering uses an AssetSearchIndex, sorting sorts the names."""
+    HEADERS = ("Thumb", "Name", "Departments")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.assets = {}
+        self.search_index = None
+        self.names: List[str] = []
+
+    def set_source(self, assets: dict, search_index: AssetSearchIndex):
+        self.assets = assets
+        self.search_index = search_index
+        self.set_names([])
+
+    def set_names(self, names):
+        self.beginResetModel()
+        self.names = list(names)
+        self.endResetModel()
+
+    def set_filter(self, text: str):
+        """Show the assets matching text, best match first."""
+        self.set_names(self.search_index.search(text))
+
+    def rowCount(self, parent=qc.QModelIndex()):  # pylint: disable=invalid-name
+        return 0 if parent.isValid() else len(self.names)
+
+    def columnCount(self, parent=qc.QModelIndex()):  # pylint: disable=invalid-name
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=qc.Qt.DisplayRole):  # pylint: disable=invalid-name
+        if orientation == qc.Qt.Horizontal and role == qc.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=qc.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        asset = self.assets.get(self.names[index.row()])
+        if asset is None:
+            return None
+        column = index.column()
+        if column == 0 and role == THUMBNAIL_ROLE:
+            # the delegate loads the image when the row becomes visible
+            thumbnail = asset.get_thumbnail()
+            return str(thumbnail) if thumbnail else ""
+        if role in (qc.Qt.DisplayRole, qc.Qt.EditRole):
+            if column == 1:
+                return asset.name
+            if column == 2:
+                return " | ".join(asset.get_deps())
+        return None
+
+    def sort(self, column, order=qc.Qt.AscendingOrder):
+        if column == 2:
+            key = lambda n: " | ".join(self.assets[n].get_deps()).lower()
+        else:
+            key = str.lower
+        self.layoutAboutToBeChanged.emit()
+        self.names.sort(key=key, reverse=order == qc.Qt.DescendingOrder)
+        self.layoutChanged.emit()
+
+
 class AssetCompleter(qw.QCompleter):
     def __init__(self):
         super().__init__()
-        self.model = qg.QStandardItemModel()
-        self.model.setColumnCount(3)
-        self.model.setHorizontalHeaderLabels(['Thumb', 'Name', 'Departments'])
+        self.model = AssetTableModel(self)
 
         self.setModel(self.model)
-        self.setFilterMode(qc.Qt.MatchFlag.MatchContains)
+        # rows are already filtered and ranked by the model
+        self.setCompletionMode(qw.QCompleter.UnfilteredPopupCompletion)
 
         table = qw.QTableView()
         table.setFixedWidth(300)
+        self.thumbnails = ThumbnailCache(80, parent=self)
+        table.setItemDelegateForColumn(0, ThumbnailDelegate(self.thumbnails, table))
 
         self.setPopup(table)
 
@@ -37,11 +106,12 @@ class AssetCompleter(qw.QCompleter):
 
         self.setCompletionColumn(1)
         self.setMaxVisibleItems(200)
-        self.setModelSorting(qw.QCompleter.CaseInsensitivelySortedModel)
 
         h_header = table.horizontalHeader()
-        h_header.setSectionResizeMode(0, qw.QHeaderView.ResizeToContents)
-        h_header.setSectionResizeMode(1, qw.QHeaderView.ResizeToContents)
+        # ResizeToContents would format every row, not only the visible ones
+        h_header.setSectionResizeMode(0, qw.QHeaderView.Fixed)
+        h_header.resizeSection(0, self.thumbnails.size)
+        h_header.setSectionResizeMode(1, qw.QHeaderView.Interactive)
         h_header.setStretchLastSection(True)
         #h_header.setStyleSheet("QHeaderView::section:horizontal {padding: 0 10 0 10;};")
 
@@ -49,24 +119,11 @@ class AssetCompleter(qw.QCompleter):
         v_header.setSectionResizeMode(qw.QHeaderView.Fixed)
         v_header.setDefaultSectionSize(45)
 
-    def clear_rows(self):
-        self.model.removeRows(
-            0, self.model.rowCount())
+    def set_source(self, assets: dict, search_index: AssetSearchIndex):
+        self.model.set_source(assets, search_index)
 
-    def add_row(self, asset):
-        name = qg.QStandardItem(asset.name)
-        icon = qg.QStandardItem()
-        icon.setData(qg.QPixmap.fromImage("C:/Users/jobo/Pictures/suzuki_swift.jpg").scaled(
-            80, 80, qc.Qt.KeepAspectRatio
-        ), qc.Qt.DecorationRole
-        )
-        deps = qg.QStandardItem(f"{' | '.join(asset.get_deps())}")
-
-        self.model.appendRow([icon, name, deps])
-
-    def add_rows(self, assets):
-        for asset in assets:
-            self.add_row(asset)
+    def set_filter(self, text: str):
+        self.model.set_filter(text)
 
 
 class SearchLineEdit(qw.QLineEdit):
@@ -139,6 +196,7 @@ class QuickFileOpen(qw.QVBoxLayout):
         self.inputs_css = "font-size: 14px; font-weight: bold;"
 
         self.asset_provider = asset_provider
+        self.asset = None
 
         self.setAlignment(qc.Qt.AlignTop)
         #self.setSpacing(2)
@@ -150,8 +208,13 @@ class QuickFileOpen(qw.QVBoxLayout):
 
         self.create_search_row()
 
-        self.completer = None
-        self.update_completer()
+        self.assets = {}
+        self.search_index = None
+        self.completer = AssetCompleter()
+        self.completer.highlighted.connect(self.completer_highlighted)
+        self.completer.activated.connect(self.set_asset)
+        self.completer.setWidget(self.search_lineedit)
+        self.rebuild_search_index()
 
         self.open_button = qw.QPushButton("Nothing selected")
         self.open_button.setDisabled(True)
@@ -161,16 +224,40 @@ class QuickFileOpen(qw.QVBoxLayout):
         self.search_lineedit.setFocus()
 
     def on_asset_created(self, asset):
-        self.completer.popup().hide()
-        self.asset_provider.assets[asset.name] = asset
-        self.update_completer()
+        self.on_assets_created([asset])
 
-    def update_completer(self):
-        self.completer = AssetCompleter()
-        self.completer.add_rows(self.asset_provider.list_assets())
-        self.completer.highlighted.connect(self.completer_highlighted)
-        self.completer.activated.connect(self.set_asset)
-        self.search_lineedit.setCompleter(self.completer)
+    def on_assets_created(self, assets):
+        for asset in assets:
+            self.assets[asset.name] = asset
+            self.search_index.add(asset)
+        self.refresh_completer()
+
+    def on_asset_list_reloaded(self, _):
+        self.rebuild_search_index()
+
+    def on_asset_versions_changed(self, asset):
+        """Refresh the version list if versions of the current asset changed."""
+        # a new version may come with a new department
+        self.assets[asset.name] = asset
+        self.search_index.add(asset)
+        if asset is self.asset:
+            self.dept_changed(None)
+
+    def rebuild_search_index(self):
+        self.assets = {a.name: a for a in self.asset_provider.list_assets()}
+        self.search_index = AssetSearchIndex(self.assets.values())
+        self.completer.set_source(self.assets, self.search_index)
+        self.refresh_completer()
+
+    def refresh_completer(self):
+        """Only refresh the completer rows if they are visible."""
+        if self.completer.popup().isVisible():
+            self.filter_completer(self.search_lineedit.text())
+
+    def filter_completer(self, text):
+        self.completer.set_filter(text)
+        self.completer.setCompletionPrefix(text)
+        self.completer.complete()
 
     def create_search_row(self):
         min_width = 50
@@ -181,6 +268,7 @@ class QuickFileOpen(qw.QVBoxLayout):
         self.search_lineedit = SearchLineEdit(
             self.inputs_height, self.inputs_css
         )
+        self.search_lineedit.textEdited.connect(self.filter_completer)
         self.search_lineedit.focus_in.connect(self.list_all)
         self.search_lineedit.mouse_pressed.connect(self.list_all)
         self.search_lineedit.tab_pressed.connect(self.set_asset)
@@ -216,8 +304,7 @@ class QuickFileOpen(qw.QVBoxLayout):
         self.completer.popup().hide()
 
     def list_all(self):
-        self.completer.setCompletionPrefix("")
-        self.completer.complete()
+        self.filter_completer("")
 
     def dept_changed(self, _):
         dept = self.dep_combo.currentText()
@@ -295,10 +382,8 @@ class QuickAssetCreator(qw.QVBoxLayout):
         ok = self.dialog.exec_()
         names = self.dialog.textValue()
         if ok:
-            names = names.split(",")
-            for name in names:
-                self.create_asset(kind, name, self.extension)
-        
+            self.create_assets(kind, names.split(","), self.extension)
+
     def check_character(self, arg):
         if not arg:
             return
@@ -309,19 +394,53 @@ class QuickAssetCreator(qw.QVBoxLayout):
         self.dialog.setTextValue(f"{arg[:-1]}{last_char}")
 
     def create_asset(self, kind, name, extension):
-        if name not in [a.name for a in self.asset_provider.list_assets()]:
+        return self.create_assets(kind, [name], extension)
+
+    def create_assets(self, kind: str, names: List[str], extension: str, workers: int=8) -> List[Asset]:
+        """Create many assets at once.
+        Folders and mother scenes are created concurrently and
+        one 'assets_created' event is posted for all of them.
+        Assets whose files could not be created are reported and left out.
+        Returns the created assets."""
+        existing = {a.name for a in self.asset_provider.list_assets()}
+        assets = []
+        for name in names:
+            name = name.strip()
+            if not name:
+                continue
+            if name in existing:
+                print(f"Asset {name} already exists. Ignored.")
+                continue
+            existing.add(name)
             asset = Asset(kind, name, extension)
-            dep = asset.get_deps()[0]
-            asset.new_version(dep, self.asset_provider.user_settings.username)
-            asset.create_folders()
-            proj_loc = Path(self.asset_provider.user_settings.local_project_location)
-            mother_scene = self.asset_provider.settings.mother_scenes.get(
-                dep, self.asset_provider.settings.mother_scenes["default"]
-            )
-            shutil.copy(proj_loc / mother_scene, asset.get_version(dep))
-            cg3event.post("asset_created", asset)
-        else:
-            print(f"Asset {name} already exists. Ignored.")
+            asset.new_version(asset.get_deps()[0], self.asset_provider.user_settings.username)
+            assets.append(asset)
+        if not assets:
+            return []
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.create_asset_files, a) for a in assets]
+        created = []
+        for asset, future in zip(assets, futures):
+            error = future.exception()
+            if error is None:
+                created.append(asset)
+            else:
+                print(f"Asset {asset.name} could not be created: {error}")
+        if created:
+            # even if some failed, the provider has to know about the ones on disk
+            cg3event.post("assets_created", created)
+        return created
+
+    def create_asset_files(self, asset: Asset):
+        """Create the folders and the first version (a copy of the mother scene)."""
+        dep = asset.get_deps()[0]
+        asset.create_folders()
+        proj_loc = Path(self.asset_provider.user_settings.local_project_location)
+        mother_scene = self.asset_provider.settings.mother_scenes.get(
+            dep, self.asset_provider.settings.mother_scenes["default"]
+        )
+        materialize(proj_loc / mother_scene, asset.get_version(dep))
 
 
 class QuickFiler(MayaQWidgetDockableMixin, qw.QWidget):
@@ -336,6 +455,7 @@ class QuickFiler(MayaQWidgetDockableMixin, qw.QWidget):
         self.setGeometry(0, 0, 300, 500)
 
         cg3event.subscribe("asset_created", self.asset_provider.on_asset_created)
+        cg3event.subscribe("assets_created", self.asset_provider.on_assets_created)
 
         self.main_layout = qw.QVBoxLayout(self)
         self.main_layout.setAlignment(qc.Qt.AlignTop)
@@ -347,11 +467,23 @@ class QuickFiler(MayaQWidgetDockableMixin, qw.QWidget):
 
         self.qfo = QuickFileOpen(self.asset_provider)
         cg3event.subscribe("asset_created", self.qfo.on_asset_created)
+        cg3event.subscribe("assets_created", self.qfo.on_assets_created)
+        cg3event.subscribe("asset_version_saved", self.qfo.on_asset_versions_changed)
+        cg3event.subscribe("asset_version_removed", self.qfo.on_asset_versions_changed)
+        cg3event.subscribe("asset_list_reloaded", self.qfo.on_asset_list_reloaded)
         self.main_layout.addLayout(self.qfo)
 
+        self.asset_provider.start_watching()
+
         self.setWindowTitle("Quick Filer")
         self.show(dockable=True)
     
     def dockCloseEventTriggered(self):
         cg3event.unsubscribe("asset_created", self.asset_provider.on_asset_created)
+        cg3event.unsubscribe("assets_created", self.asset_provider.on_assets_created)
         cg3event.unsubscribe("asset_created", self.qfo.on_asset_created)
+        cg3event.unsubscribe("assets_created", self.qfo.on_assets_created)
+        cg3event.unsubscribe("asset_version_saved", self.qfo.on_asset_versions_changed)
+        cg3event.unsubscribe("asset_version_removed", self.qfo.on_asset_versions_changed)
+        cg3event.unsubscribe("asset_list_reloaded", self.qfo.on_asset_list_reloaded)
+        self.asset_provider.stop_watching()
@@ -0,0 +1,136 @@
+"""
+Releasing versions of assets.
+
+release() copies a version file to the release file of its department
+and records the release in the release history:
+  - the release file is replaced atomically (temp file + rename),
+    so referencing scenes never load a half written release,
+  - released content is stored once in release_history/.objects,
+    named by its sha256. Releasing identical content again costs no disk,
+  - the readable history file (release_history template) is a link
+    to that object where the filesystem supports reflinks or hardlinks,
+  - every release appends one line to release_history/.releases.jsonl.
+    The history is listed from there instead of scanning directories.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from time import time
+from typing import Dict, List
+
+from cg3.event import cg3event
+from cg3.file.materialize import (
+    materialize, CHUNK_SIZE, DEFAULT_STRATEGIES, HARDLINK, REFLINK
+)
+
+HISTORY_INDEX = ".releases.jsonl"
+OBJECTS_DIR = ".objects"
+
+
+def file_hash(path, chunk_size: int = CHUNK_SIZE) -> str:
+    """sha256 hex digest of the content of path."""
+    digest = hashlib.sha256()
+    with open(str(path), "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReleaseHistory:
+    """The release index of one release_history directory.
+    Parsed entries are cached as long as the index file is unchanged.
+
+    Usage:
+    history = ReleaseHistory(asset.get_release_history_path("mod"))
+    history.entries("mod")  # [{"dep": "mod", "version": "0003", ...}, ...]
+    """
+    _cache: Dict[str, tuple] = {}  # index path -> (stat key, entries)
+    _lock = threading.Lock()
+
+    def __init__(self, history_dir):
+        self.history_dir = Path(history_dir)
+        self.index_file = self.history_dir / HISTORY_INDEX
+
+    def entries(self, dep: str = None) -> List[dict]:
+        """All releases, oldest first. Optionally only those of dep."""
+        entries = self._read()
+        if dep is None:
+            return list(entries)
+        return [e for e in entries if e["dep"] == dep]
+
+    def _read(self) -> List[dict]:
+        key = str(self.index_file)
+        try:
+            stat = os.stat(key)
+        except FileNotFoundError:
+            return []
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1]
+        with open(key, "r") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        with self._lock:
+            self._cache[key] = (stat_key, entries)
+        return entries
+
+    def object_path(self, digest: str, extension: str) -> Path:
+        return self.history_dir / OBJECTS_DIR / f"{digest}.{extension}"
+
+    def path(self, entry: dict) -> Path:
+        """The file holding the content of entry."""
+        return self.history_dir / entry["file"]
+
+    def append(self, entry: dict):
+        with self._lock:
+            with open(str(self.index_file), "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def release(asset, dep: str, version: str = "latest", user: str = "unknown",
+            comment: str = "", progress=None) -> dict:
+    """Release a version of asset in dep. Returns the new history entry.
+
+    Usage:
+    release(asset, "mod", user="jo", comment="uvs done")
+    """
+    source = asset.get_version(dep, version)
+    if source is None:
+        raise FileNotFoundError(f"No version {version} of {asset.name} in '{dep}'.")
+    scene = (
+        asset.get_max_version_scene(dep) if version == "latest"
+        else asset.get_version_scene(dep, version)
+    )
+    history = ReleaseHistory(asset.get_release_history_path(dep))
+    history.history_dir.mkdir(parents=True, exist_ok=True)
+
+    digest = file_hash(source)
+    blob = history.object_path(digest, asset.extension)
+    if not blob.exists():
+        materialize(source, blob, DEFAULT_STRATEGIES, progress)
+        # links to the object share its mode, so they are protected as well
+        os.chmod(str(blob), 0o444)
+
+    timestamp = int(time())
+    taken = {e["timestamp"] for e in history.entries(dep)}
+    while timestamp in taken:  # two releases within one second
+        timestamp += 1
+    history_file = asset.get_release_history_name(dep, timestamp)
+    try:
+        materialize(blob, history.history_dir / history_file, (REFLINK, HARDLINK))
+    except OSError:
+        # no links on this filesystem: the object is the only copy
+        history_file = f"{OBJECTS_DIR}/{blob.name}"
+
+    materialize(source, asset.get_release(dep), DEFAULT_STRATEGIES, progress)
+
+    entry = {
+        "dep": dep, "version": scene.version, "user": user,
+        "timestamp": timestamp, "comment": comment,
+        "sha256": digest, "file": history_file
+    }
+    history.append(entry)
+    cg3event.post("asset_released", asset)
+    return entry
@@ -0,0 +1,136 @@
+"""
+Incremental fuzzy search over assets.
+
+Every asset is indexed by the bigrams of its name. Its kind and departments
+are indexed separately as tags. Adding or removing an asset only touches
+the entries of that asset.
+A query is ranked by: exact name, name prefix, name substring,
+the share of the query bigrams found in the name (typos, swapped letters)
+and last assets whose kind or departments start with the query words.
+Queries shorter than MIN_FUZZY_LENGTH only match name substrings.
+"""
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+MIN_FUZZY_LENGTH = 3
+
+
+def bigrams(text: str) -> Set[str]:
+    """Bigrams of every word in text. Words are padded,
+    so 'ab' yields ' a', 'ab' and 'b '."""
+    grams = set()
+    for word in text.lower().split():
+        padded = f" {word} "
+        grams.update(padded[i:i + 2] for i in range(len(padded) - 1))
+    return grams
+
+
+class AssetSearchIndex:
+    """Usage:
+    index = AssetSearchIndex(provider.list_assets())
+    index.search("bo")      # ['bob', 'bobby', 'robot']
+    index.search("chiar")   # ['chair']
+    index.search("char")    # all assets of kind 'char'
+    index.add(new_asset)
+    index.remove("bob")
+    """
+
+    def __init__(self, assets: Iterable = (), min_similarity: float = 0.4):
+        self.min_similarity = min_similarity
+        self._grams: Dict[str, Set[str]] = {}  # asset name -> name bigrams
+        self._postings: Dict[str, Set[str]] = defaultdict(set)  # bigram -> asset names
+        self._tags: Dict[str, Set[str]] = {}  # asset name -> kind and deps
+        self._tagged: Dict[str, Set[str]] = defaultdict(set)  # tag -> asset names
+        self._names: List[Tuple[str, str]] = []  # sorted (lower case name, name)
+        for asset in assets:
+            self._index(asset)
+        self._names.sort()
+
+    def __len__(self):
+        return len(self._grams)
+
+    def add(self, asset):
+        """Index an asset. An already indexed asset is updated (eg. after a new dep)."""
+        if asset.name in self._grams:
+            self.remove(asset.name)
+        self._index(asset)
+        self._names.pop()
+        insort(self._names, (asset.name.lower(), asset.name))
+
+    def _index(self, asset):
+        grams = bigrams(asset.name)
+        self._grams[asset.name] = grams
+        for gram in grams:
+            self._postings[gram].add(asset.name)
+        tags = {t.lower() for t in [asset.kind, *asset.get_deps()] if t}
+        self._tags[asset.name] = tags
+        for tag in tags:
+            self._tagged[tag].add(asset.name)
+        self._names.append((asset.name.lower(), asset.name))
+
+    def remove(self, name: str):
+        grams = self._grams.pop(name, None)
+        if grams is None:
+            return
+        for index, keys in ((self._postings, grams), (self._tagged, self._tags.pop(name))):
+            for key in keys:
+                names = index[key]
+                names.discard(name)
+                if not names:
+                    del index[key]
+        del self._names[bisect_left(self._names, (name.lower(), name))]
+
+    def search(self, query: str, limit: int = None) -> List[str]:
+        """Return asset names matching query, best match first."""
+        query = query.strip().lower()
+        if not query:
+            return [name for _, name in self._names[:limit]]
+
+        scores = {}
+        # names starting with the query are found by bisection
+        position = bisect_left(self._names, (query,))
+        while position < len(self._names) and self._names[position][0].startswith(query):
+            lower, name = self._names[position]
+            scores[name] = (0 if lower == query else 1, 0.0)
+            position += 1
+
+        if len(query) < MIN_FUZZY_LENGTH:
+            # too few grams for a meaningful similarity
+            for lower, name in self._names:
+                if name not in scores and query in lower:
+                    scores[name] = (2, 0.0)
+        else:
+            query_grams = bigrams(query)
+            hits = Counter()
+            for gram in query_grams:
+                hits.update(self._postings.get(gram, ()))
+            for name, count in hits.items():
+                if name in scores:
+                    continue
+                similarity = count / len(query_grams)
+                if query in name.lower():
+                    scores[name] = (2, -similarity)
+                elif similarity >= self.min_similarity:
+                    scores[name] = (3, -similarity)
+
+        for name in self._tag_matches(query.split()):
+            scores.setdefault(name, (4, 0.0))
+
+        ranked = sorted(scores, key=lambda n: (scores[n], n.lower()))
+        return ranked[:limit]
+
+    def _tag_matches(self, words: List[str]) -> Set[str]:
+        """Assets with a kind or dep starting with one of the words,
+        if every other word starts a tag as well or is part of the name,
+        eg. 'char' or 'bob rig'."""
+        candidates = set()
+        for tag, names in self._tagged.items():
+            if any(tag.startswith(word) for word in words):
+                candidates.update(names)
+        return {
+            name for name in candidates if all(
+                word in name.lower() or any(tag.startswith(word) for tag in self._tags[name])
+                for word in words
+            )
+        }
@@ -0,0 +1,150 @@
+"""
+Shared engine for writing files from templates with find/replace pairs.
+
+- Template content is cached by path, mtime and size.
+  Templates bigger than the cache are never held in memory.
+- All find/replace pairs are applied as if in a single pass: longer finds
+  win over shorter ones starting at the same position and, unlike chained
+  str.replace calls, replaced text is never replaced again.
+- Big templates are streamed in chunks. Matches spanning two chunks are found.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Tuple
+
+CHUNK_SIZE = 16 * 1024 * 1024
+MAX_CACHED_BYTES = 256 * 1024 * 1024
+
+
+def _to_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+
+class Replacer:
+    """All find/replace pairs applied in a single pass
+    by one compiled alternation of the finds, longest first.
+    pattern.split() does the matching in C, so templates with many
+    placeholders need no Python callback per match."""
+
+    def __init__(self, find_replace: Tuple[Tuple[bytes, bytes], ...]):
+        self.table = {}
+        for find, repl in find_replace:
+            if find and find not in self.table:
+                self.table[find] = repl
+        # longest first: the longest find wins at a position
+        finds = sorted(self.table, key=len, reverse=True)
+        self.max_len = len(finds[0]) if finds else 0
+        self.pattern = re.compile(
+            b"(" + b"|".join(re.escape(f) for f in finds) + b")"
+        ) if finds else None
+
+    def _join(self, parts: List[bytes]) -> bytes:
+        """Join the parts of pattern.split(): text, match, text, ..., text."""
+        parts[1::2] = [self.table[find] for find in parts[1::2]]
+        return b"".join(parts)
+
+    def sub(self, content: bytes) -> bytes:
+        if self.pattern is None:
+            return content
+        return self._join(self.pattern.split(content))
+
+    def stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Replace in a stream of chunks. Yields the replaced chunks."""
+        if self.pattern is None:
+            yield from chunks
+            return
+        carry = b""
+        for chunk in chunks:
+            buffer = carry + chunk
+            # a match starting before 'safe' lies completely in the buffer
+            safe = max(len(buffer) - self.max_len + 1, 0)
+            parts = self.pattern.split(buffer)
+            # matches starting at or after 'safe' may continue in the next chunk:
+            # drop them, they are found again in the carry
+            end = len(buffer)  # where the last text part ends
+            while len(parts) > 1 and end - len(parts[-1]) - len(parts[-2]) >= safe:
+                end -= len(parts.pop()) + len(parts.pop())
+            text_start = end - len(parts[-1])
+            cut = max(safe, text_start)
+            parts[-1] = buffer[text_start:cut]
+            carry = buffer[cut:]
+            yield self._join(parts)
+        yield self.sub(carry)
+
+
+@lru_cache(maxsize=256)
+def _compile(find_replace: Tuple[Tuple[bytes, bytes], ...]) -> Replacer:
+    return Replacer(find_replace)
+
+
+def compile_find_replace(find_replace) -> Replacer:
+    """Replacer for a list of (find, replace) pairs (str or bytes). Compiled once per list."""
+    return _compile(tuple((_to_bytes(f), _to_bytes(r)) for f, r in find_replace))
+
+
+class TemplateEngine:
+    """Usage:
+    engine = TemplateEngine()
+    engine.render_to_file("templates/workspace.mel", "proj/workspace.mel",
+                          [("##FPS##", "film"), ("##OCIO##", "C:/aces/config.ocio")])
+    """
+
+    def __init__(self, max_cached_bytes: int = MAX_CACHED_BYTES, chunk_size: int = CHUNK_SIZE):
+        self.max_cached_bytes = max_cached_bytes
+        self.chunk_size = chunk_size
+        self._cache = OrderedDict()  # path -> (mtime_ns, size, content), least recent first
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def read(self, template) -> bytes:
+        """Content of template. Served from the cache if the file is unchanged."""
+        key = str(template)
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._cache.move_to_end(key)
+                return cached[2]
+        with open(key, "rb") as f:
+            content = f.read()
+        if len(content) <= self.max_cached_bytes:
+            self._store(key, (stat.st_mtime_ns, stat.st_size, content))
+        return content
+
+    def _store(self, key: str, entry: tuple):
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cached_bytes -= len(old[2])
+            self._cache[key] = entry
+            self._cached_bytes += len(entry[2])
+            while self._cached_bytes > self.max_cached_bytes:
+                _, (_, _, content) = self._cache.popitem(last=False)
+                self._cached_bytes -= len(content)
+
+    def chunks(self, template) -> Iterator[bytes]:
+        """Content of template in chunks. Templates too big for the cache are streamed."""
+        if os.path.getsize(str(template)) <= self.max_cached_bytes:
+            yield self.read(template)
+            return
+        with open(str(template), "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                yield chunk
+
+    def render(self, template, find_replace=()) -> bytes:
+        """Content of template with all pairs replaced."""
+        return compile_find_replace(find_replace).sub(self.read(template))
+
+    def render_to_file(self, template, target, find_replace=()) -> None:
+        """Write template with all pairs replaced to target."""
+        replacer = compile_find_replace(find_replace)
+        with open(str(target), "wb") as f:
+            for chunk in replacer.stream(self.chunks(template)):
+                f.write(chunk)
+
+
+# shared by all users in the Maya session
+template_engine = TemplateEngine()
@@ -0,0 +1,165 @@
+"""
+Background watcher keeping the assets of a FilesystemAssetProvider up to date.
+
+The watcher waits for changes in the directories known to the provider's
+AssetCatalog (inotify on Linux, polling everywhere else), updates the catalog
+in a background thread and applies the added and removed scenes to the
+provider in Maya's main thread. For every change an event is posted:
+  asset_created          payload: Asset (asset seen for the first time)
+  asset_version_saved    payload: Asset
+  asset_version_removed  payload: Asset
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+from typing import Dict
+
+from maya.utils import executeDeferred
+
+from cg3.event import cg3event
+
+
+class PollingBackend:
+    """Wakes up every 'interval' seconds."""
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+
+    def watch(self, paths):
+        pass
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Block until something might have changed. False if stopped."""
+        return not stop.wait(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """Wakes up when entries are created, deleted or moved in a watched directory."""
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, settle: float = 0.5):
+        self.settle = settle
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[str, int] = {}
+
+    def watch(self, paths):
+        """Watch exactly 'paths'. Raises OSError if the watch limit is reached."""
+        paths = set(paths)
+        for path in list(self.watches):
+            if path not in paths:
+                self.libc.inotify_rm_watch(self.fd, self.watches.pop(path))
+        for path in paths - self.watches.keys():
+            wd = self.libc.inotify_add_watch(self.fd, path.encode(), self.MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == 28:  # ENOSPC: fs.inotify.max_user_watches reached
+                    raise OSError(err, "inotify watch limit reached")
+                continue  # directory vanished in the meantime
+            self.watches[path] = wd
+
+    def wait(self, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            readable, _, _ = select.select([self.fd], [], [], 1.0)
+            if readable:
+                # give a save operation some time to finish, then drain all events
+                stop.wait(self.settle)
+                self._drain()
+                return not stop.is_set()
+        return False
+
+    def _drain(self):
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class AssetWatcher:
+    """Keeps provider.assets live.
+
+    Usage:
+    provider = FilesystemAssetProvider()
+    watcher = AssetWatcher(provider)
+    watcher.start()
+    ...
+    watcher.stop()
+    """
+
+    def __init__(self, provider, interval: float = 5.0):
+        self.provider = provider
+        self.interval = interval
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _create_backend(self):
+        if sys.platform.startswith("linux"):
+            try:
+                return InotifyBackend()
+            except (OSError, AttributeError):
+                pass
+        return PollingBackend(self.interval)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.backend = self._create_backend()
+        self._thread = threading.Thread(target=self._run, name="AssetWatcher")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch_catalog_dirs(self):
+        catalog = self.provider.catalog
+        try:
+            self.backend.watch(str(catalog.root / d) for d in list(catalog.dirs))
+        except OSError as err:
+            print(f"AssetWatcher: {err}. Falling back to polling.")
+            self.backend.close()
+            self.backend = PollingBackend(self.interval)
+
+    def _run(self):
+        try:
+            self._watch_catalog_dirs()
+            while self.backend.wait(self._stop):
+                changes = self.provider.catalog.update()
+                if not changes:
+                    continue
+                self._watch_catalog_dirs()
+                if changes.added or changes.removed:
+                    # provider.assets and all subscribers (Qt!) live in the main thread
+                    executeDeferred(self._apply, changes.added, changes.removed)
+        finally:
+            self.backend.close()
+
+    def _apply(self, added, removed):
+        created, saved, deleted = self.provider.apply_catalog_changes(added, removed)
+        for asset in created:
+            cg3event.post("asset_created", asset)
+        for asset in saved:
+            cg3event.post("asset_version_saved", asset)
+        for asset in deleted:
+            cg3event.post("asset_version_removed", asset)
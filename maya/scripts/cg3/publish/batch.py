@@ -0,0 +1,313 @@
+"""
+Headless batch publishing over many scenes.
+
+The controller needs no Maya, only the standard library. It starts a pool
+of mayapy worker processes, each initializing maya.standalone and loading
+the publish modules once.
+Scenes are handed to idle workers one after another, so Maya starts only
+once per worker instead of once per scene. A worker that crashes or hangs
+on a scene is replaced and the scene is reported as an error.
+
+All results are collected into a JSON and/or JUnit XML report
+(one testsuite per scene, one testcase per publish module).
+
+Usage:
+python maya/scripts/cg3/publish/batch.py --playlist CollectGeoSets CollectGeoSetsMembers CheckPostfixes \\
+    --processes 4 --json nightly.json --junit nightly.xml scenes/*.mb
+"""
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import traceback
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+RESULT_PREFIX = "cg3-batch-result:"
+SCRIPTS_DIR = Path(__file__).parents[2]
+# cg3 expects a running Maya when imported, so standalone is initialized first
+WORKER_BOOTSTRAP = (
+    "import sys, json, maya.standalone; maya.standalone.initialize(); "
+    "from cg3.publish.batch import worker_main; worker_main(json.loads(sys.argv[1]))"
+)
+
+
+def default_mayapy() -> str:
+    """mayapy next to the running interpreter (like SubQ), else the one on PATH."""
+    for name in ("mayapy", "mayapy.exe"):
+        candidate = Path(sys.executable).parent / name
+        if candidate.exists():
+            return str(candidate)
+    return os.environ.get("MAYAPY", "mayapy")
+
+
+def reportable_result(reportable) -> dict:
+    return {
+        "name": reportable.name,
+        "label": getattr(reportable, "label", reportable.name),
+        "doc": reportable.__doc__,
+        "type": str(reportable.type),
+        "failed": reportable.failed,
+        "messages": [str(m) for m in reportable.messages],
+        "duration": reportable.duration,
+    }
+
+
+class BatchWorker:
+    """One mayapy process publishing the scenes it is sent, one at a time."""
+
+    def __init__(self, mayapy: str, playlist: List[str], module_folders: List[str] = None,
+                 parameters: Dict[str, dict] = None, verbose: bool = False):
+        self.verbose = verbose
+        config = {
+            "playlist": playlist, "module_folders": module_folders or [],
+            "parameters": parameters or {}
+        }
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [str(SCRIPTS_DIR)] + [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+        )
+        self.process = subprocess.Popen(
+            [mayapy, "-u", "-c", WORKER_BOOTSTRAP, json.dumps(config)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+            universal_newlines=True, bufsize=1
+        )
+        self.scenes = 0
+
+    def publish(self, scene: str, timeout: float = None) -> dict:
+        """Result of publishing scene. The worker is killed if it takes longer than timeout."""
+        start = perf_counter()
+        self.scenes += 1
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, self.process.kill)
+            timer.start()
+        try:
+            self.process.stdin.write(scene + "\n")
+            self.process.stdin.flush()
+            for line in self.process.stdout:
+                if line.startswith(RESULT_PREFIX):
+                    return json.loads(line[len(RESULT_PREFIX):])
+                if self.verbose:
+                    print(line, end="")
+        except OSError:  # broken pipe, the worker is gone
+            pass
+        finally:
+            if timer is not None:
+                timer.cancel()
+        self.close()
+        code = self.process.returncode
+        timed_out = timeout and perf_counter() - start >= timeout
+        reason = "timed out" if timed_out else f"exited with code {code}"
+        return {
+            "scene": scene, "error": f"Worker {reason}.",
+            "duration": perf_counter() - start, "modules": []
+        }
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                self.process.wait(10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+
+def batch_publish(scenes: List[str], playlist: List[str], processes: int = 2,
+                  mayapy: str = None, module_folders: List[str] = None,
+                  parameters: Dict[str, dict] = None, timeout: float = None,
+                  recycle: int = 0, verbose: bool = False) -> List[dict]:
+    """Publish all scenes with playlist in a pool of mayapy workers.
+    Workers are reused for all scenes, unless recycle > 0: then a worker is
+    replaced after that many scenes. Returns one result per scene, in order.
+
+    Usage:
+    results = batch_publish(["a.mb", "b.mb"], ["CollectGeoSets", "CheckPostfixes"])
+    """
+    mayapy = mayapy or default_mayapy()
+    todo = queue.Queue()
+    for index, scene in enumerate(scenes):
+        todo.put((index, str(scene)))
+    results = [None] * len(scenes)
+    print_lock = threading.Lock()
+
+    def new_worker():
+        return BatchWorker(mayapy, playlist, module_folders, parameters, verbose)
+
+    def run():
+        worker = None
+        try:
+            while True:
+                try:
+                    index, scene = todo.get_nowait()
+                except queue.Empty:
+                    return
+                if worker is None or not worker.alive or (recycle and worker.scenes >= recycle):
+                    if worker is not None:
+                        worker.close()
+                    worker = new_worker()
+                result = worker.publish(scene, timeout)
+                results[index] = result
+                with print_lock:
+                    print(f"[{index + 1}/{len(scenes)}] {status(result)}: {scene}")
+        finally:
+            if worker is not None:
+                worker.close()
+
+    threads = [threading.Thread(target=run) for _ in range(max(1, min(processes, len(scenes))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def status(result: dict) -> str:
+    if result.get("error"):
+        return "Error"
+    return "Failed" if any(m["failed"] for m in result["modules"]) else "Passed"
+
+
+def summary(results: List[dict]) -> dict:
+    statuses = [status(r) for r in results]
+    return {
+        "scenes": len(results),
+        "passed": statuses.count("Passed"),
+        "failed": statuses.count("Failed"),
+        "errors": statuses.count("Error"),
+        "duration": sum(r["duration"] for r in results),
+    }
+
+
+def write_json(results: List[dict], path, playlist: List[str] = None):
+    report = {"playlist": playlist or [], "summary": summary(results), "scenes": results}
+    with open(str(path), "w") as f:
+        json.dump(report, f, indent=4)
+
+
+def write_junit(results: List[dict], path):
+    """JUnit XML: one testsuite per scene, one testcase per publish module."""
+    total = summary(results)
+    suites = ET.Element(
+        "testsuites", name="cg3 publish", tests=str(sum(max(len(r["modules"]), 1) for r in results)),
+        failures=str(sum(m["failed"] for r in results for m in r["modules"])),
+        errors=str(total["errors"]), time=f"{total['duration']:.3f}"
+    )
+    for result in results:
+        modules = result["modules"]
+        suite = ET.SubElement(
+            suites, "testsuite", name=result["scene"], tests=str(max(len(modules), 1)),
+            failures=str(sum(m["failed"] for m in modules)),
+            errors="1" if result.get("error") else "0", time=f"{result['duration']:.3f}"
+        )
+        if result.get("error"):
+            case = ET.SubElement(suite, "testcase", name="publish", classname=result["scene"])
+            ET.SubElement(case, "error", message=result["error"]).text = result.get("traceback", "")
+        for module in modules:
+            case = ET.SubElement(
+                suite, "testcase", name=module["name"], classname=result["scene"],
+                time=f"{module['duration']:.3f}"
+            )
+            if module["failed"]:
+                ET.SubElement(
+                    case, "failure", message=module["doc"] or module["name"]
+                ).text = "\n".join(module["messages"])
+    ET.ElementTree(suites).write(str(path), encoding="utf-8", xml_declaration=True)
+
+
+def worker_main(config: dict):
+    """Worker loop inside an initialized mayapy: publish every scene path read from stdin."""
+    import maya.standalone
+    import maya.cmds as cmds
+    from cg3.publish.publisher import Publisher
+
+    collected = []
+    publisher = Publisher(
+        reporter_callbacks=[lambda reportable: collected.append(reportable_result(reportable))],
+        module_folders=config["module_folders"]
+    )
+    for modname, params in config["parameters"].items():
+        publisher.module_parameters[modname].update(params)
+    publisher.playlist = list(config["playlist"])
+
+    for line in sys.stdin:
+        scene = line.strip()
+        if not scene:
+            continue
+        start = perf_counter()
+        collected.clear()
+        result = {"scene": scene, "error": None, "modules": collected}
+        try:
+            cmds.file(scene, open=True, force=True, prompt=False)
+            # scenes are independent, verdicts of one are never reused for the next
+            publisher.publish(use_cache=False)
+        except Exception as err:
+            result["error"] = f"{type(err).__name__}: {err}"
+            result["traceback"] = traceback.format_exc()
+        result["duration"] = perf_counter() - start
+        sys.stdout.write(RESULT_PREFIX + json.dumps(result) + "\n")
+        sys.stdout.flush()
+    maya.standalone.uninitialize()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="batch.py", description="Run a publish playlist over many scenes."
+    )
+    parser.add_argument("scenes", nargs="*", help="Scene files to publish.")
+    parser.add_argument("--scene-list", help="Text file with one scene path per line.")
+    parser.add_argument("--playlist", nargs="+", help="Publish modules to run, in order.")
+    parser.add_argument("--module-folder", action="append", default=[],
+                        help="Additional folder with publish modules.")
+    parser.add_argument("--parameters", help="JSON file {module: {parameter: value}}.")
+    parser.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Number of mayapy workers.")
+    parser.add_argument("--mayapy", default=None, help="mayapy executable.")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Seconds a scene may take before its worker is killed.")
+    parser.add_argument("--recycle", type=int, default=0,
+                        help="Replace a worker after this many scenes (0: never).")
+    parser.add_argument("--json", help="Write the report as JSON to this file.")
+    parser.add_argument("--junit", help="Write the report as JUnit XML to this file.")
+    parser.add_argument("--verbose", action="store_true", help="Print the output of the workers.")
+    args = parser.parse_args(argv)
+
+    scenes = list(args.scenes)
+    if args.scene_list:
+        with open(args.scene_list) as f:
+            scenes.extend(line.strip() for line in f if line.strip())
+    if not scenes or not args.playlist:
+        parser.error("At least one scene and a --playlist are required.")
+    parameters = {}
+    if args.parameters:
+        with open(args.parameters) as f:
+            parameters = json.load(f)
+
+    results = batch_publish(
+        scenes, args.playlist, args.processes, args.mayapy, args.module_folder,
+        parameters, args.timeout, args.recycle, args.verbose
+    )
+    if args.json:
+        write_json(results, args.json, args.playlist)
+    if args.junit:
+        write_junit(results, args.junit)
+    total = summary(results)
+    print(
+        f"{total['scenes']} scenes: {total['passed']} passed, {total['failed']} failed, "
+        f"{total['errors']} errors ({total['duration']:.1f} s publish time)"
+    )
+    return 0 if total["passed"] == total["scenes"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
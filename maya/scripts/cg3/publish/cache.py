@@ -0,0 +1,69 @@
+"""
+Verdicts of publish checks, kept between publishes.
+
+Artists usually re-run the playlist after fixing a few objects. The
+verdict of an expensive check (the topology detectors) for a mesh is
+stored with a content key of the mesh's points and faces. The key is
+computed once when the mesh is read into the snapshot. On the next run
+the verdict is reused as long as the key is unchanged, so only meshes
+changed since the last run are evaluated again. Cheap checks on
+NodeRecords are not cached, hashing a record costs more than checking it.
+Verdicts of a module are dropped when its parameters change.
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+def content_key(*parts) -> str:
+    """Digest of parts. Arrays are hashed by their raw bytes, everything else by repr()."""
+    digest = hashlib.sha1()
+    for part in parts:
+        if hasattr(part, "tobytes"):
+            digest.update(str(part.shape).encode())
+            digest.update(part.tobytes())
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+class VerdictCache:
+    """Usage:
+    cache = VerdictCache()
+    cache.bind("CheckLaminaFaces", {})
+    faces, hit = cache.get("CheckLaminaFaces", "chairShape", mesh.key,
+                           lambda: topology.lamina_faces(mesh))
+    """
+
+    def __init__(self):
+        self._verdicts: Dict[Tuple[str, str], Tuple[str, Any]] = {}  # (module, node) -> (key, verdict)
+        self._parameters: Dict[str, str] = {}  # module -> content key of its parameters
+        self._lock = threading.Lock()
+
+    def bind(self, module: str, parameters: dict):
+        """Drop the verdicts of module if it runs with other parameters than before."""
+        key = content_key(sorted(parameters.items()))
+        with self._lock:
+            if self._parameters.get(module) != key:
+                self._parameters[module] = key
+                self._verdicts = {k: v for k, v in self._verdicts.items() if k[0] != module}
+
+    def get(self, module: str, node: str, key: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(verdict, True) if the verdict of node for key is known,
+        else (compute(), False) and the result is stored."""
+        cached = self._verdicts.get((module, node))
+        if cached is not None and cached[0] == key:
+            return cached[1], True
+        verdict = compute()
+        with self._lock:
+            self._verdicts[(module, node)] = (key, verdict)
+        return verdict, False
+
+    def clear(self):
+        with self._lock:
+            self._verdicts = {}
+            self._parameters = {}
+
+    def __len__(self):
+        return len(self._verdicts)
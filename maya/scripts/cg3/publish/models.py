@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Any, List
+from typing import Any, Callable, List
 from enum import Enum
 
 
@@ -14,9 +14,29 @@ class Action(Enum):
 
 @dataclass
 class Reportable:
+    """Base of all publish modules.
+
+    Modules that only read the scene set 'read_only' and split their work:
+    extract() reads from Maya in the main thread, evaluate() judges the
+    extracted data in a worker thread and must not touch Maya.
+    finish() runs in the main thread after evaluate() returned.
+    By default extract() returns the NodeRecords of the items from the
+    publish's SceneSnapshot and evaluate() passes each to check_node().
+    All other modules are run via collect(), check() and export()
+    in the main thread.
+    Expensive evaluations can be cached between publishes with verdict()
+    (see cg3.publish.cache).
+    """
     failed: bool = False
     stop_on_failed: bool = True
     messages: list = field(default_factory=list)
+    duration: float = 0.0  # wall time in seconds of the last run
+    cache_hits: int = 0  # nodes whose cached verdict was reused
+    cache_misses: int = 0  # nodes that were evaluated
+
+    read_only = False
+    snapshot = None  # SceneSnapshot of the running publish, set by the Publisher
+    verdicts = None  # VerdictCache of the Publisher, None to evaluate every node
 
     @property
     def name(self) -> str:
@@ -37,6 +57,9 @@ class Reportable:
     def reset(self):
         self.failed = False
         self.messages = []
+        self.duration = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def collect(self, *args, **kwargs) -> List[Any]:
         return []
@@ -44,5 +67,38 @@ class Reportable:
     def check(self, items):
         pass
 
+    def extract(self, items) -> Any:
+        """Read all data evaluate() needs from the scene. Main thread."""
+        return self.snapshot.records(items)
+
+    def evaluate(self, data):
+        """Judge the extracted data. Worker thread for read_only modules."""
+        for node in data:
+            messages = self.check_node(node)
+            if messages:
+                self.failed = True
+                self.messages.extend(messages)
+
+    def verdict(self, node: str, key: str, compute: Callable[[], Any]) -> Any:
+        """Cached result of compute() for node as long as key is unchanged.
+        key has to be computed when the data is extracted, not per module."""
+        if self.verdicts is None:
+            self.cache_misses += 1
+            return compute()
+        verdict, hit = self.verdicts.get(self.name, node, key, compute)
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+        return verdict
+
+    def finish(self):
+        """Main thread follow up of evaluate(), eg. to resolve component names."""
+        pass
+
+    def check_node(self, node) -> List[str]:
+        """Messages for one NodeRecord. Empty if the node passes."""
+        return []
+
     def export(self, items):
         pass
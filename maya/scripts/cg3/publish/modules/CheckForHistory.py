@@ -1,6 +1,5 @@
 from typing import List
 
-import pymel.core as pc
 from cg3.publish.models import Reportable
 
 
@@ -8,17 +7,13 @@ class CheckForHistory(Reportable):
     """Check for history."""
 
     label = "No History"
-    
-    def check(self, items):
-        """The check method."""
-        for mesh in [m for m in items if m.type() in self.types]:
-            shape = mesh.getShape()
-            if shape is None:
-                continue
-            connections = shape.connections(s=True, d=False)
-            if connections:
-                self.failed = True
-                self.messages.append(f"Object '{mesh}' has history.")
+    read_only = True
+
+    def check_node(self, node):
+        """Objects of self.types whose shape has incoming connections."""
+        if node.type in self.types and node.shapes and node.has_history:
+            return [f"Object '{node.name}' has history."]
+        return []
 
     def get_default_parameters(self):
         """Default parameters."""
@@ -1,4 +1,3 @@
-import pymel.core as pc
 from cg3.publish.models import Reportable
 
 
@@ -6,11 +5,10 @@ class CheckInitialShadingGroupApplied(Reportable):
     """Check that only 'initialShadingGroup' is applied."""
 
     label = "Initial Shading Group"
+    read_only = True
 
-    def check(self, items):
+    def check_node(self, node):
         """Check for shadingEngines with name other than 'initialShadingGroup'."""
-        for mesh in [m for m in items if hasattr(m, "getShapes")]:
-            connections = mesh.getShape().connections(type="shadingEngine")
-            if connections[0].name() != "initialShadingGroup":
-                self.messages.append(f"Object '{mesh}' has shaders assigned.")
-                self.failed = True
+        if node.shading_engines and node.shading_engines[0] != "initialShadingGroup":
+            return [f"Object '{node.name}' has shaders assigned."]
+        return []
@@ -1,14 +1,20 @@
 import pymel.core as pc
-from cg3.publish.models import Reportable
+from cg3.publish import topology
 
 
-class CheckLaminaFaces(Reportable):
+class CheckLaminaFaces(topology.MeshCheck):
     """Check for lamina faces."""
 
     label = "No Lamina Faces"
+    component = "f"
+    message = "Lamina Faces deteced:"
+
+    def detect(self, mesh):
+        return topology.lamina_faces(mesh)
 
     def check(self, items):
-        """Select all items and run cleanup with only lamina faces checked."""
+        """Fallback without NumPy.
+        Select all items and run cleanup with only lamina faces checked."""
         pc.select(items, r=True)
         pc.mel.eval(
             'polyCleanupArgList 4 { "0","2","1","0","0","0","0","0","0","1e-05","0","1e-05","0","1e-05","0","-1","1","0" };'
@@ -1,4 +1,3 @@
-import pymel.core as pc
 from cg3.publish.models import Reportable
 
 
@@ -6,10 +5,10 @@ class CheckMultipleShapeNodes(Reportable):
     """Checks for multiple shape nodes in an object."""
 
     label = "One shape node only"
+    read_only = True
 
-    def check(self, items):
+    def check_node(self, node):
         """Check for mulitple Shape Nodes"""
-        for mesh in [m for m in items if hasattr(m, "getShapes")]:
-            if len(mesh.getShapes()) > 1:
-                self.failed = True
-                self.messages.append(f"Multiple shapes detected in {mesh.name()}.")
+        if node.is_transform and len(node.shapes) > 1:
+            return [f"Multiple shapes detected in {node.name}."]
+        return []
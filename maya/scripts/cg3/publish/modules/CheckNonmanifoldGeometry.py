@@ -1,14 +1,20 @@
 import pymel.core as pc
-from cg3.publish.models import Reportable
+from cg3.publish import topology
 
 
-class CheckNonmanifoldGeometry(Reportable):
+class CheckNonmanifoldGeometry(topology.MeshCheck):
     """Check for nonmanifold geometry (Normals and Geo)."""
 
     label = "No Nonmanifold Geometry"
+    component = "e"
+    message = "Nonmanifold geometry deteced:"
+
+    def detect(self, mesh):
+        return topology.nonmanifold_edges(mesh)
 
     def check(self, items):
-        """Select all items and run cleanup with only nonmanifold checked."""
+        """Fallback without NumPy.
+        Select all items and run cleanup with only nonmanifold checked."""
         pc.select(items, r=True)
         pc.mel.eval(
             'polyCleanupArgList 4 { "0","2","1","0","0","0","0","0","0","1e-05","0","1e-05","0","1e-05","0","1","0","0" };'
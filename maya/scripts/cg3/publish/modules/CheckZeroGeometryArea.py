@@ -1,14 +1,20 @@
 import pymel.core as pc
-from cg3.publish.models import Reportable
+from cg3.publish import topology
 
 
-class CheckZeroGeometryArea(Reportable):
+class CheckZeroGeometryArea(topology.MeshCheck):
     """Check for faces with zero area."""
 
     label = "No Zero Area Faces"
+    component = "f"
+    message = "Faces with zero area deteced:"
+
+    def detect(self, mesh):
+        return topology.zero_area_faces(mesh)
 
     def check(self, items):
-        """Select all items and run cleanup with 'Faces with zero geometry area' checked."""
+        """Fallback without NumPy.
+        Select all items and run cleanup with 'Faces with zero geometry area' checked."""
         pc.select(items, r=True)
         pc.mel.eval(
             'polyCleanupArgList 4 { "0","2","1","0","0","0","0","0","1","1e-05","0","1e-05","0","1e-05","0","-1","0","0" };'
@@ -1,14 +1,20 @@
 import pymel.core as pc
-from cg3.publish.models import Reportable
+from cg3.publish import topology
 
 
-class CheckZeroLengthEdges(Reportable):
+class CheckZeroLengthEdges(topology.MeshCheck):
     """Check for edges with zero length."""
 
     label = "No Zero Length Edges"
+    component = "e"
+    message = "Edges with zero length deteced:"
+
+    def detect(self, mesh):
+        return topology.zero_length_edges(mesh)
 
     def check(self, items):
-        """Select all items and run cleanup with 'Edges with zero length' checked."""
+        """Fallback without NumPy.
+        Select all items and run cleanup with 'Edges with zero length' checked."""
         pc.select(items, r=True)
         pc.mel.eval(
             'polyCleanupArgList 4 { "0","2","1","0","0","0","0","0","0","1e-05","1","1e-05","0","1e-05","0","-1","0","0" };'
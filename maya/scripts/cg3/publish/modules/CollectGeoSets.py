@@ -8,7 +8,7 @@ class CollectGeoSets(Reportable):
     label = "Sets postfixed '_geo'"
 
     def collect(self):
-        geo_sets = pc.ls(sets=True, regex="*_geo")
+        geo_sets = list(self.snapshot.sets("*_geo"))
         if not geo_sets:
             self.messages.append(
                 "No set detected. Add all publishable geo to a set ending with _geo"
@@ -19,4 +19,4 @@ class CollectGeoSets(Reportable):
             self.messages.append(
                 f"Collected {num_sets} geo set{'s' if num_sets > 1 else ''}."
             )
-        return geo_sets
+        return [pc.PyNode(s) for s in geo_sets]
@@ -8,14 +8,18 @@ class CollectGeoSetsMembers(Reportable):
     label = "Members of '_geo' sets"
 
     def collect(self):
-        geo_sets = pc.ls(sets=True, regex="*_geo")
         meshes = []
-        for geo_set in geo_sets:
-            meshes.extend(geo_set.members())
+        for geo_set, members in self.snapshot.sets("*_geo").items():
+            meshes.extend(members)
             if not meshes:
                 self.messages.append(f"No members in set '{geo_set}'.")
         if not meshes:
             self.failed = True
         else:
             self.messages.append(f"Collected {len(meshes)} Objects.")
-        return meshes
+        # components (eg. 'chairShape.f[0:9]') are kept as they are,
+        # nodes are resolved by their full path
+        return [
+            pc.PyNode(self.snapshot.nodes[m].path if m in self.snapshot.nodes else m)
+            for m in meshes
+        ]
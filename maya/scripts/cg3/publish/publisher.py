@@ -1,17 +1,25 @@
 """Module providing the core publishing class."""
 import importlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
+from time import perf_counter
 from typing import Dict, List, Callable
 
+from cg3.publish.cache import VerdictCache
 from cg3.publish.models import Reportable, Action
+from cg3.publish.snapshot import SceneSnapshot
 
 
 def print_reporter(reportable: Reportable):
     """Report by printing to console."""
     print(reportable.__doc__)
-    print("\t", "Failed" if reportable.failed else "Passed")
+    stats = f"{reportable.duration * 1000:.1f} ms"
+    evaluated = reportable.cache_hits + reportable.cache_misses
+    if reportable.cache_hits:
+        stats += f", {reportable.cache_hits} of {evaluated} cached"
+    print("\t", "Failed" if reportable.failed else "Passed", f"({stats})")
     for message in reportable.messages:
         print("\t", message)
 
@@ -30,6 +38,8 @@ class Publisher:
         self.module_parameters: Dict[str, dict] = {}
         self.playlist: List[str] = []
         self.stopped = False
+        self.snapshot: SceneSnapshot = None
+        self.verdicts = VerdictCache()  # kept between publishes
 
         self.reporter_callbacks = [print_reporter]
         if reporter_callbacks is not None:
@@ -74,22 +84,72 @@ class Publisher:
     def list_modules(self, action:Action):
         return [m for n, m in self.availible_modules.items() if m.type == action]
         
-    def publish(self):
-        """The collect, check, export, process function."""
+    def publish(self, workers: int = 4, use_cache: bool = True):
+        """The collect, check, export, process function.
+        The playlist runs in phases: all collects, then all checks, then all exports.
+        Read only modules of a phase are evaluated concurrently in a thread pool,
+        while the other modules of the phase run in the main thread.
+        If a module fails with stop_on_failed, the following phases are skipped
+        (and the following collects, if it is a collect).
+        With use_cache, verdicts of unchanged meshes are taken from the last publish."""
         self.stopped = False
         self.items = []
+        self.snapshot = SceneSnapshot()
+        modules = []
         for modname in self.playlist:
-            if self.stopped:
-                break
             module = self.availible_modules[modname]
             module.reset()
+            module.snapshot = self.snapshot
+            module.verdicts = self.verdicts if use_cache else None
             module.set_parameters(**self.module_parameters[modname])
-            self.items.extend(module.collect() or [])
-            module.check(self.items)
-            module.export(self.items)
-            self.call_reporters(module)
-            if module.failed and module.stop_on_failed:
-                self.stopped = True
+            self.verdicts.bind(modname, self.module_parameters[modname])
+            modules.append(module)
+
+        for action in Action:
+            phase = [m for m in modules if (m.type or Action.Check) == action]
+            if self.stopped or not phase:
+                continue
+            if action == Action.Collect:
+                # collected items add up, so collects run one after the other
+                # and a failing collect stops right away
+                for module in phase:
+                    self.run_timed(module, lambda m: self.items.extend(m.collect() or []))
+                    self.call_reporters(module)
+                    if module.failed and module.stop_on_failed:
+                        self.stopped = True
+                        break
+                continue
+            self.run_concurrent(phase, workers)
+            for module in phase:
+                self.call_reporters(module)
+                if module.failed and module.stop_on_failed:
+                    self.stopped = True
+
+    def run_concurrent(self, phase: List[Reportable], workers: int):
+        """Run a check or export phase. Data of read only modules is extracted
+        in the main thread and evaluated in the pool."""
+        items = list(self.items)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for module in [m for m in phase if m.read_only]:
+                data = self.run_timed(module, lambda m: m.extract(items))
+                futures.append((module, executor.submit(
+                    self.run_timed, module, lambda m, data=data: m.evaluate(data)
+                )))
+            for module in [m for m in phase if not m.read_only]:
+                self.run_timed(module, lambda m: (m.check(items), m.export(items)))
+            for module, future in futures:
+                future.result()
+                self.run_timed(module, lambda m: m.finish())
+
+    @staticmethod
+    def run_timed(module: Reportable, function: Callable):
+        """Call function(module) and add the wall time to module.duration."""
+        start = perf_counter()
+        try:
+            return function(module)
+        finally:
+            module.duration += perf_counter() - start
 
 
 # from cg3.publish.publisher import Publisher
@@ -0,0 +1,150 @@
+"""
+Scene data shared by all publish modules.
+
+A SceneSnapshot is created once per publish. Nodes are read in bulk via
+maya.api.OpenMaya into plain NodeRecords, so checks work on cached data
+instead of querying Maya node by node through PyMEL.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+import maya.api.OpenMaya as om
+
+
+@dataclass
+class NodeRecord:
+    """Everything the publish checks need to know about one node."""
+    name: str  # shortest unique name, like str(PyNode)
+    path: str  # full path for dag nodes
+    type: str
+    is_transform: bool = False
+    shapes: List[str] = field(default_factory=list)
+    has_history: bool = False  # first shape has incoming connections
+    shading_engines: List[str] = field(default_factory=list)  # of the first shape
+    translation: Tuple[float, ...] = (0.0, 0.0, 0.0)
+    rotation: Tuple[float, ...] = (0.0, 0.0, 0.0)
+    scale: Tuple[float, ...] = (1.0, 1.0, 1.0)
+    matrix: Tuple[float, ...] = ()  # local transformation matrix, 16 values
+
+
+def _connections(node: om.MObject) -> Tuple[bool, List[str]]:
+    """(has incoming connections, names of connected shadingEngines)"""
+    has_incoming = False
+    shading_engines = []
+    for plug in om.MFnDependencyNode(node).getConnections():
+        if plug.isDestination:
+            has_incoming = True
+        if plug.isSource:
+            for destination in plug.connectedTo(False, True):
+                dst_node = destination.node()
+                if dst_node.hasFn(om.MFn.kShadingEngine):
+                    name = om.MFnDependencyNode(dst_node).name()
+                    if name not in shading_engines:
+                        shading_engines.append(name)
+    return has_incoming, shading_engines
+
+
+def _dag_record(dag: om.MDagPath) -> NodeRecord:
+    node = dag.node()
+    record = NodeRecord(
+        dag.partialPathName(), dag.fullPathName(), om.MFnDependencyNode(node).typeName
+    )
+    if not node.hasFn(om.MFn.kTransform):
+        return record
+    record.is_transform = True
+    transform = om.MFnTransform(dag)
+    record.translation = tuple(transform.translation(om.MSpace.kTransform))
+    rotation = transform.rotation()
+    record.rotation = (rotation.x, rotation.y, rotation.z)
+    record.scale = tuple(transform.scale())
+    record.matrix = tuple(transform.transformation().asMatrix())
+
+    first_shape = None
+    for i in range(dag.childCount()):
+        child = dag.child(i)
+        if not child.hasFn(om.MFn.kShape):
+            continue
+        shape = om.MDagPath(dag)
+        shape.push(child)
+        record.shapes.append(shape.partialPathName())
+        if first_shape is None:
+            first_shape = child
+    if first_shape is not None:
+        record.has_history, record.shading_engines = _connections(first_shape)
+    return record
+
+
+class SceneSnapshot:
+    """Usage:
+    snapshot = SceneSnapshot()
+    snapshot.sets("*_geo")                # {"chair_geo": ["chair", "leg1", ...]}
+    snapshot.records(["chair", "leg1"])   # [NodeRecord(...), ...]
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, NodeRecord] = {}
+        self._sets: Dict[str, Dict[str, List[str]]] = {}  # pattern -> set name -> members
+        self.meshes: Dict[str, object] = {}  # shape -> topology.MeshData
+
+    def sets(self, pattern: str) -> Dict[str, List[str]]:
+        """Sets matching pattern and the names of their members.
+        Component members (eg. faces) are named by their selection
+        strings ('chairShape.f[0:9]'), all others by their record name.
+        Records of all members are captured in the same pass."""
+        if pattern in self._sets:
+            return self._sets[pattern]
+        found = {}
+        selection = om.MSelectionList()
+        try:
+            selection.add(pattern)
+        except RuntimeError:
+            pass  # nothing matches
+        for i in range(selection.length()):
+            node = selection.getDependNode(i)
+            if not node.hasFn(om.MFn.kSet):
+                continue
+            set_fn = om.MFnDependencyNode(node)
+            set_name = set_fn.name()
+            self.nodes.setdefault(set_name, NodeRecord(set_name, set_name, set_fn.typeName))
+            members = om.MFnSet(node).getMembers(False)
+            found[set_name] = [
+                name for j in range(members.length()) for name in self._member_names(members, j)
+            ]
+        self._sets[pattern] = found
+        return found
+
+    def _member_names(self, members: om.MSelectionList, index: int) -> List[str]:
+        record = self._capture(members, index)
+        try:
+            component = members.getComponent(index)[1]
+        except TypeError:  # no dag node
+            return [record.name]
+        if component.isNull():
+            return [record.name]
+        return list(members.getSelectionStrings(index))
+
+    def _capture(self, selection: om.MSelectionList, index: int) -> NodeRecord:
+        try:
+            dag = selection.getDagPath(index)
+        except TypeError:  # no dag node
+            node = selection.getDependNode(index)
+            name = om.MFnDependencyNode(node).name()
+            record = NodeRecord(name, name, om.MFnDependencyNode(node).typeName)
+        else:
+            record = _dag_record(dag)
+        self.nodes.setdefault(record.name, record)
+        return self.nodes[record.name]
+
+    def record(self, name: str) -> NodeRecord:
+        """Record of the node called name. Captured if not in the snapshot yet."""
+        record = self.nodes.get(name)
+        if record is None:
+            selection = om.MSelectionList()
+            selection.add(name)
+            record = self._capture(selection, 0)
+            self.nodes[name] = record
+        return record
+
+    def records(self, items: Iterable) -> List[NodeRecord]:
+        """Records of items (PyNodes or names)."""
+        return [self.record(str(item)) for item in items]
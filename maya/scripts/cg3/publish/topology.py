@@ -0,0 +1,226 @@
+"""
+Vectorized mesh topology validation.
+
+The vertex positions and face vertex lists of a mesh are read via MFnMesh
+once per publish (cached in the SceneSnapshot). Lamina faces, non-manifold
+edges, zero area faces and zero length edges are then computed with NumPy,
+which releases the GIL, so the checks run concurrently in the publish pool.
+
+Faces are reported with their Maya face ids. Edges are computed as vertex
+pairs and translated to Maya edge ids with edge_ids() in the main thread.
+
+NumPy is optional. Without it HAS_NUMPY is False and the topology checks
+fall back to polyCleanup.
+"""
+from typing import List
+
+import maya.api.OpenMaya as om
+
+from cg3.publish.cache import content_key
+from cg3.publish.models import Reportable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAS_NUMPY = np is not None
+# same tolerances the polyCleanup based checks use
+AREA_TOLERANCE = 1e-05
+LENGTH_TOLERANCE = 1e-05
+
+
+class MeshData:
+    """Points and face vertex lists of one mesh as arrays."""
+
+    def __init__(self, name: str, points, counts, vertex_ids):
+        self.name = name
+        self.points = points            # (num_vertices, 3) float
+        self.counts = counts            # vertices per face
+        self.vertex_ids = vertex_ids    # vertex ids of all faces, concatenated
+        self.starts = np.cumsum(counts) - counts  # first face vertex of each face
+        # content key for cached verdicts, shared by all checks of a publish
+        self.key = content_key(points, counts, vertex_ids)
+        self._face_edges = None
+
+    @property
+    def face_edges(self):
+        """(a, b) vertex pair of every face edge in winding order."""
+        if self._face_edges is None:
+            following = np.arange(1, len(self.vertex_ids) + 1)
+            following[self.starts + self.counts - 1] = self.starts
+            self._face_edges = np.stack(
+                (self.vertex_ids, self.vertex_ids[following]), axis=1
+            )
+        return self._face_edges
+
+
+def read_mesh(snapshot, shape: str) -> MeshData:
+    """MeshData of shape. None if shape is no mesh or an intermediate object.
+    Cached in the snapshot. Main thread."""
+    if shape in snapshot.meshes:
+        return snapshot.meshes[shape]
+    selection = om.MSelectionList()
+    selection.add(shape)
+    dag = selection.getDagPath(0)
+    mesh = None
+    if dag.hasFn(om.MFn.kMesh) and not om.MFnDagNode(dag).isIntermediateObject:
+        fn = om.MFnMesh(dag)
+        counts, vertex_ids = fn.getVertices()
+        mesh = MeshData(
+            dag.partialPathName(),
+            np.array(fn.getPoints(om.MSpace.kObject), dtype=np.float64)[:, :3],
+            np.array(counts, dtype=np.int64),
+            np.array(vertex_ids, dtype=np.int64)
+        )
+    snapshot.meshes[shape] = mesh
+    return mesh
+
+
+def read_meshes(snapshot, records) -> List[MeshData]:
+    """MeshData of all mesh shapes of records. Main thread."""
+    meshes = []
+    for record in records:
+        for shape in record.shapes or ([record.name] if record.type == "mesh" else []):
+            mesh = read_mesh(snapshot, shape)
+            if mesh is not None and mesh not in meshes:
+                meshes.append(mesh)
+    return meshes
+
+
+def _edge_keys(mesh: MeshData, directed: bool = False):
+    """One int64 per face edge. Much faster to unique than vertex pairs.
+    Undirected keys are the same for (a, b) and (b, a)."""
+    a, b = mesh.face_edges[:, 0], mesh.face_edges[:, 1]
+    if not directed:
+        a, b = np.minimum(a, b), np.maximum(a, b)
+    return a * len(mesh.points) + b
+
+
+def _unique(keys):
+    """Sorted unique keys and their number of occurrences."""
+    # np.unique without return_counts is much slower on numpy 2.x
+    keys = np.sort(keys)
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    starts = np.nonzero(first)[0]
+    return keys[starts], np.diff(np.append(starts, len(keys)))
+
+
+def _pairs(mesh: MeshData, keys):
+    """Undirected vertex pairs of edge keys."""
+    pairs = np.stack(np.divmod(keys, len(mesh.points)), axis=1)
+    return np.sort(pairs, axis=1)
+
+
+def lamina_faces(mesh: MeshData):
+    """Ids of faces sharing all their vertices with another face."""
+    lamina = []
+    for count in np.unique(mesh.counts):
+        faces = np.nonzero(mesh.counts == count)[0]
+        if len(faces) < 2:
+            continue
+        rows = np.sort(mesh.vertex_ids[mesh.starts[faces, None] + np.arange(count)], axis=1)
+        _, inverse, occurrences = np.unique(
+            rows, axis=0, return_inverse=True, return_counts=True
+        )
+        lamina.append(faces[occurrences[inverse.ravel()] > 1])
+    return np.sort(np.concatenate(lamina)) if lamina else np.empty(0, dtype=np.int64)
+
+
+def zero_area_faces(mesh: MeshData, tolerance: float = AREA_TOLERANCE):
+    """Ids of faces with an area below tolerance."""
+    if not len(mesh.counts):
+        return np.empty(0, dtype=np.int64)
+    points = mesh.points
+    face_of = np.repeat(np.arange(len(mesh.counts)), mesh.counts)
+    origin = points[mesh.vertex_ids[mesh.starts]][face_of]
+    edges = mesh.face_edges
+    # vector area of the fan triangles spanned from the first vertex of each face
+    cross = np.cross(points[edges[:, 0]] - origin, points[edges[:, 1]] - origin)
+    area = 0.5 * np.linalg.norm(np.add.reduceat(cross, mesh.starts, axis=0), axis=1)
+    return np.nonzero(area < tolerance)[0]
+
+
+def zero_length_edges(mesh: MeshData, tolerance: float = LENGTH_TOLERANCE):
+    """Vertex pairs of edges shorter than tolerance."""
+    edges = _pairs(mesh, _unique(_edge_keys(mesh))[0])
+    lengths = np.linalg.norm(mesh.points[edges[:, 0]] - mesh.points[edges[:, 1]], axis=1)
+    return edges[lengths < tolerance]
+
+
+def nonmanifold_edges(mesh: MeshData):
+    """Vertex pairs of edges shared by more than two faces or
+    by two faces with opposite normals (same winding direction)."""
+    keys, occurrences = _unique(_edge_keys(mesh))
+    directed, directed_occurrences = _unique(_edge_keys(mesh, True))
+    edges = np.concatenate((
+        _pairs(mesh, keys[occurrences > 2]),
+        _pairs(mesh, directed[directed_occurrences > 1])
+    ))
+    return np.unique(edges, axis=0)
+
+
+def edge_ids(mesh: MeshData, pairs) -> List[int]:
+    """Maya edge ids of vertex pairs. Main thread."""
+    selection = om.MSelectionList()
+    selection.add(mesh.name)
+    dag = selection.getDagPath(0)
+    fn = om.MFnMesh(dag)
+    vertices = om.MItMeshVertex(dag)
+    ids = []
+    for a, b in pairs:
+        vertices.setIndex(int(a))
+        for edge in vertices.getConnectedEdges():
+            if set(fn.getEdgeVertices(edge)) == {int(a), int(b)}:
+                ids.append(edge)
+                break
+    return sorted(ids)
+
+
+def components(name: str, kind: str, indices) -> str:
+    """Maya component string, eg. components('pCube1', 'f', [1, 2, 3, 7]) ->
+    'pCube1.f[1:3] pCube1.f[7]'"""
+    ranges = []
+    for index in sorted(int(i) for i in indices):
+        if ranges and ranges[-1][1] == index - 1:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+    return " ".join(
+        f"{name}.{kind}[{a}]" if a == b else f"{name}.{kind}[{a}:{b}]" for a, b in ranges
+    )
+
+
+class MeshCheck(Reportable):
+    """Base of the checks running one detector on all meshes of the items.
+    Subclasses set 'component' ("f" or "e") and 'message' and implement detect().
+    Without NumPy the subclass' check() is run instead."""
+    read_only = HAS_NUMPY
+    component = "f"
+    message = "Invalid components detected:"
+
+    def reset(self):
+        super().reset()
+        self.found = []  # (MeshData, face ids or vertex pairs)
+
+    def detect(self, mesh: MeshData):
+        """Face ids or vertex pairs of the invalid components of mesh."""
+        return []
+
+    def extract(self, items) -> List[MeshData]:
+        return read_meshes(self.snapshot, self.snapshot.records(items))
+
+    def evaluate(self, meshes: List[MeshData]):
+        for mesh in meshes:
+            invalid = self.verdict(mesh.name, mesh.key, lambda mesh=mesh: self.detect(mesh))
+            if len(invalid):
+                self.found.append((mesh, invalid))
+
+    def finish(self):
+        for mesh, invalid in self.found:
+            ids = edge_ids(mesh, invalid) if self.component == "e" else invalid
+            self.failed = True
+            self.messages.append(
+                f"{self.message}\n\t\t{components(mesh.name, self.component, ids)}"
+            )
@@ -0,0 +1,105 @@
+"""
+Lazily loaded, disk cached thumbnails for item views.
+
+Thumbnails are only requested when a ThumbnailDelegate paints a cell,
+which Qt only does for visible rows. Decoding and scaling happens
+in a QThreadPool. The scaled images are cached on disk keyed by
+source path and mtime, so the next Maya session only has to read
+a small png per visible row.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+import PySide2.QtCore as qc
+import PySide2.QtGui as qg
+import PySide2.QtWidgets as qw
+
+from cg3.env.vars import getenv
+
+# item data role holding the path of the source image
+THUMBNAIL_ROLE = qc.Qt.UserRole + 1
+
+
+class _JobSignals(qc.QObject):
+    done = qc.Signal(str, qg.QImage)
+
+
+class _ThumbnailJob(qc.QRunnable):
+    def __init__(self, source: str, cache_dir: Path, size: int, signals: _JobSignals):
+        super().__init__()
+        self.source = source
+        self.cache_dir = cache_dir
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        image = qg.QImage()
+        try:
+            mtime = os.stat(self.source).st_mtime_ns
+        except OSError:
+            self.signals.done.emit(self.source, image)
+            return
+        key = hashlib.sha1(f"{self.source}|{mtime}|{self.size}".encode()).hexdigest()
+        cache_file = str(self.cache_dir / f"{key}.png")
+        if not image.load(cache_file) and image.load(self.source):
+            image = image.scaled(
+                self.size, self.size, qc.Qt.KeepAspectRatio, qc.Qt.SmoothTransformation
+            )
+            image.save(cache_file)
+        self.signals.done.emit(self.source, image)
+
+
+class ThumbnailCache(qc.QObject):
+    """Loads thumbnails in the background. 'loaded' is emitted with the
+    source path when a thumbnail becomes available via get()."""
+    loaded = qc.Signal(str)
+
+    def __init__(self, size: int = 80, cache_dir: str = None, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.cache_dir = Path(
+            cache_dir or f"{getenv('MAYA_APP_DIR')}/cg3_thumbnails"
+        )
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.pixmaps = {}
+        self.pending = set()
+        self.pool = qc.QThreadPool(self)
+        self.signals = _JobSignals(self)
+        self.signals.done.connect(self._job_done)
+
+    def get(self, source: str) -> qg.QPixmap:
+        """Return the thumbnail of source or None if it is not loaded (yet)."""
+        pixmap = self.pixmaps.get(source)
+        if pixmap is None and source and source not in self.pending:
+            self.pending.add(source)
+            self.pool.start(_ThumbnailJob(source, self.cache_dir, self.size, self.signals))
+        return pixmap
+
+    def _job_done(self, source: str, image: qg.QImage):
+        # QPixmaps may only be created in the main thread
+        self.pending.discard(source)
+        self.pixmaps[source] = qg.QPixmap.fromImage(image)
+        if not image.isNull():
+            self.loaded.emit(source)
+
+
+class ThumbnailDelegate(qw.QStyledItemDelegate):
+    """Paints the thumbnail of the image path stored in THUMBNAIL_ROLE."""
+
+    def __init__(self, thumbnails: ThumbnailCache, view: qw.QAbstractItemView):
+        super().__init__(view)
+        self.thumbnails = thumbnails
+        self.thumbnails.loaded.connect(lambda _: view.viewport().update())
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        pixmap = self.thumbnails.get(index.data(THUMBNAIL_ROLE))
+        if pixmap is None or pixmap.isNull():
+            return
+        x = option.rect.x() + (option.rect.width() - pixmap.width()) // 2
+        y = option.rect.y() + (option.rect.height() - pixmap.height()) // 2
+        painter.drawPixmap(x, y, pixmap)
+
+    def sizeHint(self, option, index):  # pylint: disable=invalid-name
+        return qc.QSize(self.thumbnails.size, self.thumbnails.size)
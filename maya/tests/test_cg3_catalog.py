@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from cg3.file.catalog import AssetCatalog, TemplateLevels
+from cg3.test import TestCase
+
+TEMPLATE = "${kind}/${name}/versions/${dep}/${name}_${dep}_${user}_${version}.${extension}"
+
+
+class AssetCatalogTests(TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, str(self.root), ignore_errors=True)
+
+    def save_scene(self, kind, name, dep, version, user="jo"):
+        folder = self.root / kind / name / "versions" / dep
+        folder.mkdir(parents=True, exist_ok=True)
+        scene = folder / f"{name}_{dep}_{user}_{version}.ma"
+        scene.touch()
+        return scene
+
+    def test_update_returns_its_own_changes(self):
+        self.save_scene("char", "bob", "mod", "0001")
+        catalog = AssetCatalog(str(self.root), TEMPLATE)
+        first = catalog.update()
+        self.assertTrue(first)
+        self.assertEqual([s["name"] for s in first.added], ["bob"])
+
+        self.save_scene("prop", "chair", "mod", "0001")
+        second = catalog.update()
+        self.assertEqual([s["name"] for s in second.added], ["chair"])
+        self.assertEqual(second.removed, [])
+        # an earlier result is not touched by later updates
+        self.assertEqual([s["name"] for s in first.added], ["bob"])
+        self.assertFalse(catalog.update())
+
+    def test_incremental_update_lists_only_changed_dirs(self):
+        self.save_scene("char", "bob", "mod", "0001")
+        self.save_scene("char", "bob", "rig", "0001")
+        self.save_scene("prop", "chair", "mod", "0001")
+        (self.root / "char" / "bob" / "images").mkdir()  # not matching the template
+        catalog = AssetCatalog(str(self.root), TEMPLATE)
+        catalog.update()
+        self.assertNotIn("char/bob/images", catalog.dirs)
+        self.assertEqual(len(list(catalog.scenes())), 3)
+
+        folder = self.root / "char" / "bob" / "versions" / "mod"
+        self.save_scene("char", "bob", "mod", "0002")
+        os.utime(str(folder), ns=(0, catalog.dirs["char/bob/versions/mod"]["mtime"] + 10**9))
+        changes = catalog.update()
+        self.assertEqual(catalog.listed_dirs, 1)
+        self.assertEqual([s["version"] for s in changes.added], ["0002"])
+
+        # a new catalog reads the listings from the catalog file
+        reloaded = AssetCatalog(str(self.root), TEMPLATE)
+        self.assertEqual(list(reloaded.scenes()), list(catalog.scenes()))
+        self.assertFalse(reloaded.update())
+        self.assertEqual(reloaded.listed_dirs, 0)
+
+    def test_removed_scenes(self):
+        scene = self.save_scene("char", "bob", "mod", "0001")
+        self.save_scene("char", "bob", "mod", "0002")
+        catalog = AssetCatalog(str(self.root), TEMPLATE)
+        catalog.update()
+        scene.unlink()
+        folder = scene.parent
+        os.utime(str(folder), ns=(0, catalog.dirs["char/bob/versions/mod"]["mtime"] + 10**9))
+        changes = catalog.update()
+        self.assertEqual([s["version"] for s in changes.removed], ["0001"])
+        self.assertEqual(changes.added, [])
+
+    def test_scenes_while_update_replaces_dirs(self):
+        self.save_scene("char", "bob", "mod", "0001")
+        self.save_scene("prop", "chair", "mod", "0001")
+        catalog = AssetCatalog(str(self.root), TEMPLATE)
+        catalog.update()
+
+        scenes = catalog.scenes()
+        first = next(scenes)
+        shutil.rmtree(str(self.root / "prop"))
+        changes = catalog.update()
+        self.assertEqual([s["name"] for s in changes.removed], ["chair"])
+        # the running iteration still sees the catalog it started with
+        self.assertEqual([first["name"]] + [s["name"] for s in scenes], ["bob", "chair"])
+        self.assertEqual([s["name"] for s in catalog.scenes()], ["bob"])
+
+
+class TemplateLevelsTests(TestCase):
+    def setUp(self):
+        self.levels = TemplateLevels(TEMPLATE)
+
+    def test_literal_level(self):
+        values = {"kind": "char", "name": "bob"}
+        self.assertEqual(self.levels.match(2, "versions", values), values)
+        self.assertIsNone(self.levels.match(2, "release_history", values))
+
+    def test_variables_of_upper_levels_match_literally(self):
+        values = {"kind": "char", "name": "bob", "dep": "mod"}
+        self.assertEqual(
+            self.levels.match(4, "bob_mod_jo_0003.ma", values),
+            {**values, "user": "jo", "version": "0003", "extension": "ma"}
+        )
+        self.assertIsNone(self.levels.match(4, "bobby_mod_jo_0003.ma", values))
+        self.assertIsNone(self.levels.match(4, "bob_rig_jo_0003.ma", values))
+
+    def test_repeated_variable_in_one_level(self):
+        levels = TemplateLevels("${name}/${name}_${dep}.${extension}")
+        self.assertEqual(
+            levels.match(1, "bob_mod.ma", {"name": "bob"}),
+            {"name": "bob", "dep": "mod", "extension": "ma"}
+        )
+        levels = TemplateLevels("${name}_${name}.${extension}")
+        self.assertEqual(levels.match(0, "bob_bob.ma", {})["name"], "bob")
+        self.assertIsNone(levels.match(0, "bob_alice.ma", {}))
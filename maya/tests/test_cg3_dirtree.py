@@ -0,0 +1,135 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from cg3.file.dirtree import Dirtree, run_plan
+from cg3.test import TestCase
+
+
+def asset_tree() -> Dirtree:
+    tree = Dirtree("bob")
+    tree.add_new_dirs(["versions", "release"])
+    tree.versions.add_new_dirs(["mod", "rig"])
+    tree.versions.mod.add_new_file("workspace.mel", "workspace.mel")
+    tree.versions.mod.get_file("workspace.mel").find_replace.append(("##FPS##", "film"))
+    tree.versions.rig.add_new_file("notes.txt", "notes.txt")
+    tree.release.add_new_file("empty.txt")
+    return tree
+
+
+def temp_dir(test: TestCase) -> Path:
+    """A new directory, removed after the test."""
+    path = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return Path(path)
+
+
+def listing(root: Path):
+    return sorted(str(p.relative_to(root)) for p in root.rglob("*"))
+
+
+class DirtreeCreateTests(TestCase):
+    def setUp(self):
+        self.root = temp_dir(self)
+        self.templates = temp_dir(self)
+        (self.templates / "workspace.mel").write_text("fps ##FPS##;")
+        (self.templates / "notes.txt").write_text("##FPS##")
+
+    def test_plan_orders_parents_first(self):
+        steps = asset_tree().plan(self.root, self.templates)
+        self.assertEqual(
+            [(s.action, str(s.path.relative_to(self.root)), s.depth) for s in steps],
+            [
+                ("mkdir", "bob", 0),
+                ("mkdir", "bob/versions", 1),
+                ("mkdir", "bob/versions/mod", 2),
+                ("write", "bob/versions/mod/workspace.mel", 3),
+                ("mkdir", "bob/versions/rig", 2),
+                ("copy", "bob/versions/rig/notes.txt", 3),
+                ("mkdir", "bob/release", 1),
+                ("touch", "bob/release/empty.txt", 2),
+            ]
+        )
+
+    def test_dry_run_touches_nothing(self):
+        steps = asset_tree().create(self.root, self.templates, dry_run=True)
+        self.assertEqual(len(steps), 8)
+        self.assertEqual(listing(self.root), [])
+
+    def test_create(self):
+        steps = asset_tree().create(self.root, self.templates, workers=4)
+        self.assertEqual(listing(self.root), sorted(str(s.path.relative_to(self.root)) for s in steps))
+        bob = self.root / "bob"
+        self.assertEqual((bob / "versions" / "mod" / "workspace.mel").read_text(), "fps film;")
+        self.assertEqual((bob / "versions" / "rig" / "notes.txt").read_text(), "##FPS##")
+        self.assertEqual((bob / "release" / "empty.txt").read_text(), "")
+
+    def test_run_plan_raises_errors_of_workers(self):
+        steps = asset_tree().plan(self.root, self.templates)
+        (self.root / "bob").mkdir()
+        with self.assertRaises(FileExistsError):
+            run_plan(steps)
+
+
+class DirtreeReadTests(TestCase):
+    def setUp(self):
+        self.root = temp_dir(self)
+        for folder in ("bob/versions/mod", "bob/versions/rig", "bob/release", "bob/.git"):
+            (self.root / folder).mkdir(parents=True)
+        for file in ("bob/versions/mod/bob_mod_jo_0001.ma", "bob/versions/mod/bob.swatches",
+                     "bob/release/bob_mod.ma", "bob/notes.txt"):
+            (self.root / file).touch()
+
+    def test_round_trip(self):
+        for workers in (1, 4):
+            tree = Dirtree().read_from_path(self.root / "bob", workers=workers)
+            copy = temp_dir(self)
+            Dirtree().from_dict(tree.as_dict()).create(copy)
+            self.assertEqual(listing(copy / "bob"), listing(self.root / "bob"))
+
+    def test_ignore_and_max_depth(self):
+        tree = Dirtree().read_from_path(self.root / "bob", ignore=[".git", "*.swatches"])
+        self.assertEqual([d.name for d in tree.dirs], ["release", "versions"])
+        self.assertEqual([f.name for f in tree.versions.mod.files], ["bob_mod_jo_0001.ma"])
+
+        tree = Dirtree().read_from_path(self.root / "bob", max_depth=1)
+        self.assertEqual([d.name for d in tree.dirs], [".git", "release", "versions"])
+        self.assertEqual([f.name for f in tree.release.files], ["bob_mod.ma"])
+        self.assertEqual(tree.versions.dirs, [])
+
+        tree = Dirtree().read_from_path(self.root / "bob", max_depth=0)
+        self.assertEqual(tree.dirs, [])
+        self.assertEqual([f.name for f in tree.files], ["notes.txt"])
+
+
+class DirtreeIndexTests(TestCase):
+    def test_lookup(self):
+        tree = asset_tree()
+        self.assertIs(tree.versions, tree.dirs[0])
+        self.assertIs(tree.release.get_file("empty.txt"),
+                      tree.release.files[0])
+        with self.assertRaises(ValueError):
+            tree.get_dir("shots")
+        with self.assertRaises(ValueError):
+            tree.release.get_file("missing.txt")
+        with self.assertRaises(AttributeError):
+            tree.__missing_dunder__
+
+    def test_index_follows_changes(self):
+        tree = asset_tree()
+        tree.versions.get_dir("mod")  # build the index
+        tree.versions.dirs.append(Dirtree("anim"))
+        self.assertEqual(tree.versions.anim.name, "anim")
+        tree.versions.mod.name = "model"
+        self.assertEqual(tree.versions.get_dir("model").name, "model")
+        with self.assertRaises(ValueError):
+            tree.versions.get_dir("mod")
+        tree.versions.dirs = [Dirtree("lookdev")]
+        self.assertEqual(tree.versions.lookdev.name, "lookdev")
+        with self.assertRaises(ValueError):
+            tree.versions.get_dir("rig")
+
+    def test_first_of_duplicate_names(self):
+        tree = Dirtree("bob")
+        tree.add_new_dirs(["mod", "mod"])
+        self.assertIs(tree.mod, tree.dirs[0])
@@ -0,0 +1,41 @@
+from cg3.file.models import Scene, SceneVersions
+from cg3.test import TestCase
+
+
+def scene(version: int, user: str = "jo") -> Scene:
+    return Scene("char", "bob", "ma", "mod", user, None, version)
+
+
+class SceneVersionsTests(TestCase):
+    def setUp(self):
+        self.versions = SceneVersions([scene(1), scene(3), scene(2)])
+
+    def test_sorted_by_version(self):
+        self.assertEqual([s.get_version() for s in self.versions], [1, 2, 3])
+        self.assertEqual([s.get_version() for s in reversed(self.versions)], [3, 2, 1])
+        self.assertEqual([s.get_version() for s in self.versions[:2]], [1, 2])
+        self.assertEqual(self.versions[-1].get_version(), 3)
+        self.assertEqual(len(self.versions), 3)
+
+    def test_lookup(self):
+        self.assertEqual(self.versions.get("0002"), scene(2))
+        self.assertEqual(self.versions.get(2), scene(2))
+        self.assertIsNone(self.versions.get("0004"))
+        self.assertEqual(self.versions.latest(), scene(3))
+        self.assertIsNone(SceneVersions().latest())
+        self.assertIn(scene(1), self.versions)
+        self.assertNotIn(scene(1, "lisa"), self.versions)
+
+    def test_append_replaces_same_version(self):
+        self.versions.append(scene(2, "lisa"))
+        self.assertEqual(len(self.versions), 3)
+        self.assertEqual(self.versions.get(2).user, "lisa")
+        self.versions.append(scene(10))
+        self.assertEqual(self.versions.latest().get_version(), 10)
+
+    def test_remove(self):
+        self.versions.remove(self.versions.get(3))
+        self.assertEqual(self.versions.latest(), scene(2))
+        self.assertEqual(self.versions, [scene(1), scene(2)])
+        with self.assertRaises(ValueError):
+            self.versions.remove(scene(3))
@@ -0,0 +1,292 @@
+import re
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from cg3.env.settings import Settings
+from cg3.file.models import Asset
+from cg3.file.providers import (
+    CachedAssetProvider, GoogleSheetsAssetProvider, SqliteAssetProvider
+)
+from cg3.test import TestCase
+
+PROJECT_SETTINGS = (
+    Path(__file__).parent.parent / "scripts/cg3/setup/templates/project_settings.json"
+)
+HEADER = [
+    "asset", "kind", "status", "dep", "version",
+    "comment", "user", "timestamp", "extension"
+]
+
+
+def temp_dir(test: TestCase) -> str:
+    """A new directory, removed after the test."""
+    path = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+class InMemoryWorksheet:
+    """Fake of the used gspread Worksheet API. Records all requests."""
+
+    def __init__(self, rows):
+        self.values = [HEADER] + [self._cells(r) for r in rows]
+        self.requests = []
+
+    @staticmethod
+    def _cells(row):
+        return ["" if v is None else str(v) for v in row]
+
+    def get_all_values(self):
+        self.requests.append("get_all_values")
+        return [list(r) for r in self.values]
+
+    def get(self, range_name):
+        self.requests.append("get")
+        first_row = int(re.match(r"A(\d+):", range_name).group(1))
+        rows = [list(r) for r in self.values[first_row - 1:]]
+        # like the sheets api: trailing empty cells are omitted
+        for row in rows:
+            while row and row[-1] == "":
+                row.pop()
+        return rows
+
+    def append_rows(self, rows):
+        self.requests.append("append_rows")
+        self.values.extend(self._cells(r) for r in rows)
+
+
+class GoogleSheetsAssetProviderTests(TestCase):
+    def setUp(self):
+        user_settings = Settings()
+        user_settings.local_project_location = temp_dir(self)
+        patcher = mock.patch(
+            "cg3.file.providers.get_user_settings", return_value=user_settings
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.sheet = InMemoryWorksheet([
+            ("bob", "char", "WIP", None, None, None, None, None, "ma"),
+            ("bob", None, None, "mod", 1, "Initial Save", "jo", 1600000000, "ma"),
+            ("table", "prop", "WIP", None, None, None, None, None, "ma"),
+            ("bob", None, None, "mod", 2, "", "jo", 1600000100, "ma"),
+        ])
+        self.provider = GoogleSheetsAssetProvider(
+            settings=Settings(str(PROJECT_SETTINGS)), worksheet=self.sheet
+        )
+
+    def test_initial_load_reads_sheet_once(self):
+        self.assertEqual(self.sheet.requests, ["get_all_values"])
+        self.assertEqual(
+            [a.name for a in self.provider.list_assets()], ["bob", "table"]
+        )
+        self.assertEqual(self.provider.get("bob").get_max_version_scene("mod").version, "0002")
+
+    def test_reload_pulls_only_appended_rows(self):
+        self.sheet.append_rows([
+            ("bob", None, None, "rig", 1, "", "lisa", 1600000200, "ma"),
+        ])
+        self.sheet.requests = []
+        self.provider.reload_asset_list()
+        self.assertEqual(self.sheet.requests, ["get"])
+        self.assertEqual(self.provider.get("bob").get_deps(), ["mod", "rig"])
+        self.assertEqual(len(self.provider.rows), 5)
+
+    def test_last_column_beyond_z(self):
+        self.assertEqual(self.provider._last_column(), "I")
+        self.provider.header = HEADER + [f"note{i}" for i in range(20)]
+        self.assertEqual(self.provider._last_column(), "AC")
+
+    def test_edited_sheet_triggers_full_reload(self):
+        self.sheet.values[-1][5] = "changed comment"
+        self.sheet.requests = []
+        self.provider.reload_asset_list()
+        self.assertEqual(self.sheet.requests, ["get", "get_all_values"])
+        self.assertEqual(
+            self.provider.get("bob").get_version_scene("mod", 2).comment,
+            "changed comment"
+        )
+
+    def test_asset_creation_is_one_write(self):
+        asset = Asset("prop", "chair", "ma")
+        asset.new_version(asset.get_start_dep(), "jo")
+        self.sheet.requests = []
+        self.provider.on_asset_created(asset)
+        self.assertEqual(self.sheet.requests, ["append_rows", "get"])
+        self.assertEqual(len(self.sheet.values), 7)
+        self.assertIsNotNone(self.provider.get("chair").get_version_scene("mod", 1))
+
+    def test_bulk_asset_creation_is_one_write(self):
+        assets = [Asset("prop", name, "ma") for name in ("chair", "lamp", "sofa")]
+        for asset in assets:
+            asset.new_version(asset.get_start_dep(), "jo")
+        self.sheet.requests = []
+        self.provider.on_assets_created(assets)
+        self.assertEqual(self.sheet.requests, ["append_rows", "get"])
+        self.assertEqual(len(self.sheet.values), 11)
+        self.assertEqual(
+            [a.name for a in self.provider.list_assets()],
+            ["bob", "chair", "lamp", "sofa", "table"]
+        )
+
+
+class CachedSqliteAssetProviderTests(TestCase):
+    def setUp(self):
+        user_settings = Settings()
+        user_settings.local_project_location = temp_dir(self)
+        patcher = mock.patch(
+            "cg3.file.providers.get_user_settings", return_value=user_settings
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.settings = Settings(str(PROJECT_SETTINGS))
+        self.database = self.get_temp_filename("assets.db")
+
+    def test_refreshes_from_different_threads(self):
+        provider = CachedAssetProvider(
+            lambda: SqliteAssetProvider(self.database, settings=self.settings),
+            snapshot_file=self.get_temp_filename("snapshot.json"),
+            settings=self.settings
+        )
+        # first refresh: the backend is opened in a background thread
+        self.assertTrue(provider.wait_for_sync(10))
+        self.assertIsNotNone(provider.backend)
+
+        asset = Asset("prop", "chair", "ma")
+        asset.new_version(asset.get_start_dep(), "jo")
+        with mock.patch.object(provider, "reload_asset_list"):
+            provider.on_assets_created([asset])
+        # second refresh in this thread replays the queued asset
+        provider._sync()
+
+        self.assertEqual(provider.pending, [])
+        self.assertIsNotNone(provider.backend.get("chair").get_version_scene("mod", 1))
+        self.assertEqual([a.name for a in provider.list_assets()], ["chair"])
+
+    def test_snapshot_per_project(self):
+        app_dir = temp_dir(self)
+        patcher = mock.patch("cg3.file.providers.getenv", return_value=app_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        provider = CachedAssetProvider(
+            lambda: SqliteAssetProvider(self.database, settings=self.settings),
+            settings=self.settings
+        )
+        self.assertTrue(provider.wait_for_sync(10))
+        other_settings = Settings()
+        other_settings.local_project_location = temp_dir(self)
+        with mock.patch("cg3.file.providers.get_user_settings", return_value=other_settings):
+            other = CachedAssetProvider(
+                lambda: SqliteAssetProvider(self.database, settings=self.settings),
+                settings=self.settings
+            )
+        self.assertTrue(other.wait_for_sync(10))
+        self.assertNotEqual(provider.snapshot_file, other.snapshot_file)
+        self.assertTrue(str(provider.snapshot_file).startswith(app_dir))
+
+    def test_requests_during_a_refresh_are_merged(self):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow_backend():
+            calls.append(threading.current_thread())
+            started.set()
+            release.wait(10)
+            return SqliteAssetProvider(self.database, settings=self.settings)
+
+        provider = CachedAssetProvider(
+            slow_backend, snapshot_file=self.get_temp_filename("snapshot.json"),
+            settings=self.settings
+        )
+        started.wait(10)
+        follow_ups = []
+        sync = provider._sync
+        provider._sync = lambda: (follow_ups.append(1), sync())
+        for _ in range(5):
+            provider.reload_asset_list()
+        release.set()
+        self.assertTrue(provider.wait_for_sync(10))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(follow_ups), 1)
+        self.assertIs(calls[0], provider._thread)
+
+    def test_queued_assets_are_retried(self):
+        calls = []
+
+        def flaky_backend():
+            calls.append(1)
+            if len(calls) < 4:
+                raise ConnectionError("share not mounted")
+            return SqliteAssetProvider(self.database, settings=self.settings)
+
+        with mock.patch.object(CachedAssetProvider, "retry_delay", 0.01), \
+                self.assertLogs("cg3.file.providers", "WARNING"):
+            provider = CachedAssetProvider(
+                flaky_backend, snapshot_file=self.get_temp_filename("snapshot.json"),
+                settings=self.settings
+            )
+            self.assertTrue(provider.wait_for_sync(10))
+            asset = Asset("prop", "chair", "ma")
+            asset.new_version(asset.get_start_dep(), "jo")
+            provider.on_assets_created([asset])
+            # no further reload_asset_list() calls, the provider retries on its own
+            for _ in range(500):
+                if not provider.pending:
+                    break
+                threading.Event().wait(0.01)
+        self.assertEqual(provider.pending, [])
+        self.assertEqual(len(calls), 4)
+        self.assertIsNotNone(provider.backend.get("chair"))
+        # the backend got a copy, the served asset is the created one
+        self.assertIsNot(provider.backend.get("chair"), asset)
+
+
+class CachedGoogleSheetsAssetProviderTests(TestCase):
+    def setUp(self):
+        user_settings = Settings()
+        user_settings.local_project_location = temp_dir(self)
+        patcher = mock.patch(
+            "cg3.file.providers.get_user_settings", return_value=user_settings
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.settings = Settings(str(PROJECT_SETTINGS))
+        self.sheet = InMemoryWorksheet([
+            ("bob", "char", "WIP", None, None, None, None, None, "ma"),
+            ("bob", None, None, "mod", 1, "Initial Save", "jo", 1600000000, "ma"),
+        ])
+        self.provider = CachedAssetProvider(
+            lambda: GoogleSheetsAssetProvider(settings=self.settings, worksheet=self.sheet),
+            snapshot_file=self.get_temp_filename("snapshot.json"),
+            settings=self.settings
+        )
+        self.assertTrue(self.provider.wait_for_sync(10))
+
+    def test_replay_failing_after_append_writes_once(self):
+        get = self.sheet.get
+
+        def get_failing_after_append(range_name):
+            if self.sheet.requests[-1] == "append_rows":
+                self.sheet.requests.append("failed get")
+                raise ConnectionError("timeout")
+            return get(range_name)
+
+        asset = Asset("prop", "chair", "ma")
+        asset.new_version(asset.get_start_dep(), "jo")
+        with mock.patch.object(self.provider, "reload_asset_list"):
+            self.provider.on_assets_created([asset])
+        with mock.patch.object(self.sheet, "get", get_failing_after_append), \
+                mock.patch("cg3.file.providers.cg3event.post") as post:
+            with self.assertLogs("cg3.file.providers", "WARNING"):
+                self.provider._sync()
+            self.assertEqual(self.provider.pending, [asset])
+            self.assertEqual(post.call_args[0][0], "asset_sync_failed")
+            self.provider._sync()
+
+        self.assertEqual(self.provider.pending, [])
+        self.assertEqual([r[0] for r in self.sheet.values[1:]], ["bob", "bob", "chair", "chair"])
+        self.assertEqual([a.name for a in self.provider.list_assets()], ["bob", "chair"])
+        self.assertIsNot(self.provider.get("bob"), self.provider.backend.get("bob"))
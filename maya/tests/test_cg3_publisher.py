@@ -0,0 +1,50 @@
+from unittest import mock
+
+from cg3.publish.models import Reportable
+from cg3.publish.publisher import Publisher
+from cg3.test import TestCase
+
+runs = []
+
+
+class CollectBroken(Reportable):
+    def collect(self):
+        runs.append(self.name)
+        self.failed = True
+        return []
+
+
+class CollectGeo(Reportable):
+    def collect(self):
+        runs.append(self.name)
+        return ["chair_geo"]
+
+
+class CheckGeo(Reportable):
+    def check(self, items):
+        runs.append(self.name)
+
+
+class PublisherTests(TestCase):
+    def setUp(self):
+        del runs[:]
+        self.reported = []
+        with mock.patch.object(Publisher, "load_availible_modules"):
+            self.publisher = Publisher(reporter_callbacks=[self.reported.append])
+        for module in (CollectBroken(), CollectGeo(), CheckGeo()):
+            self.publisher.availible_modules[module.name] = module
+            self.publisher.module_parameters[module.name] = {}
+        self.publisher.playlist = ["CollectBroken", "CollectGeo", "CheckGeo"]
+
+    def test_failed_collect_stops_right_away(self):
+        self.publisher.publish()
+        self.assertTrue(self.publisher.stopped)
+        self.assertEqual(runs, ["CollectBroken"])
+        self.assertEqual([m.name for m in self.reported], ["CollectBroken"])
+
+    def test_failed_collect_without_stop_on_failed(self):
+        self.publisher.availible_modules["CollectBroken"].stop_on_failed = False
+        self.publisher.publish()
+        self.assertFalse(self.publisher.stopped)
+        self.assertEqual(runs, ["CollectBroken", "CollectGeo", "CheckGeo"])
+        self.assertEqual(self.publisher.items, ["chair_geo"])
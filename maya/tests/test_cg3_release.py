@@ -0,0 +1,153 @@
+import errno
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from cg3.file import materialize as mat
+from cg3.file.release import ReleaseHistory, release
+from cg3.test import TestCase
+
+
+def unsupported(*args, **kwargs):
+    raise OSError(errno.EOPNOTSUPP, "not supported")
+
+
+def temp_dir(test: TestCase) -> Path:
+    """A new directory, removed after the test."""
+    path = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return Path(path)
+
+
+class MaterializeTests(TestCase):
+    def setUp(self):
+        mat._unsupported.clear()
+        self.addCleanup(mat._unsupported.clear)
+        self.folder = temp_dir(self)
+        self.source = self.folder / "source.ma"
+        self.source.write_bytes(b"//Maya ASCII scene\n" * 100)
+
+    def test_falls_back_to_copy(self):
+        target = self.folder / "target.ma"
+        with mock.patch.object(mat, "_reflink", side_effect=unsupported) as reflink:
+            self.assertEqual(mat.materialize(self.source, target), mat.COPY)
+            self.assertEqual(target.read_bytes(), self.source.read_bytes())
+            # the failed strategy is not tried again for these devices
+            self.assertEqual(mat.materialize(self.source, target), mat.COPY)
+            self.assertEqual(reflink.call_count, 1)
+        self.assertEqual(sorted(p.name for p in self.folder.iterdir()), ["source.ma", "target.ma"])
+
+    def test_permission_errors_are_not_remembered(self):
+        target = self.folder / "target.ma"
+        denied = OSError(errno.EPERM, "operation not permitted")
+        with mock.patch.object(mat, "_hardlink", side_effect=denied) as hardlink:
+            for _ in range(2):
+                strategy = mat.materialize(self.source, target, (mat.HARDLINK, mat.COPY))
+                self.assertEqual(strategy, mat.COPY)
+            self.assertEqual(hardlink.call_count, 2)
+        self.assertEqual(mat._unsupported, set())
+
+    def test_real_errors_are_raised(self):
+        with self.assertRaises(FileNotFoundError):
+            mat.materialize(self.folder / "missing.ma", self.folder / "target.ma")
+        with self.assertRaises(ValueError):
+            mat.materialize(self.source, self.folder / "target.ma", ("teleport",))
+
+    def test_hardlink(self):
+        target = self.folder / "history" / "source_0001.ma"
+        strategy = mat.materialize(self.source, target, (mat.HARDLINK, mat.COPY))
+        self.assertEqual(strategy, mat.HARDLINK)
+        self.assertTrue(os.path.samefile(str(self.source), str(target)))
+        # linking to itself again must neither fail nor leave a temp file behind
+        self.assertEqual(mat.materialize(self.source, target, (mat.HARDLINK,)), mat.HARDLINK)
+        self.assertEqual([p.name for p in target.parent.iterdir()], ["source_0001.ma"])
+
+    def test_copy_progress(self):
+        calls = []
+        mat.materialize(
+            self.source, self.folder / "target.ma", (mat.COPY,),
+            progress=lambda done, total: calls.append((done, total)), chunk_size=500
+        )
+        size = self.source.stat().st_size
+        self.assertEqual(calls[-1], (size, size))
+        self.assertEqual(len(calls), -(-size // 500))
+
+
+class FakeAsset:
+    """The parts of Asset release() uses."""
+    name = "bob"
+    extension = "ma"
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.version = folder / "versions" / "mod" / "bob_mod_jo_0001.ma"
+        self.version.parent.mkdir(parents=True)
+        self.version.write_bytes(b"//Maya ASCII scene\n")
+
+    def get_version(self, dep, version="latest"):
+        return self.version if self.version.exists() else None
+
+    def get_max_version_scene(self, dep):
+        return mock.Mock(version="0001")
+
+    def get_release_history_path(self, dep):
+        return self.folder / "release_history" / dep
+
+    def get_release_history_name(self, dep, timestamp):
+        return f"bob_{dep}_{timestamp}.ma"
+
+    def get_release(self, dep):
+        return self.folder / "release" / f"bob_{dep}.ma"
+
+
+class ReleaseTests(TestCase):
+    def setUp(self):
+        mat._unsupported.clear()
+        self.addCleanup(mat._unsupported.clear)
+        self.asset = FakeAsset(temp_dir(self))
+        posted = mock.patch("cg3.file.release.cg3event.post")
+        self.post = posted.start()
+        self.addCleanup(posted.stop)
+
+    def test_identical_releases_share_one_object(self):
+        first = release(self.asset, "mod", user="jo")
+        second = release(self.asset, "mod", user="jo", comment="again")
+        self.assertNotEqual(first["timestamp"], second["timestamp"])
+        self.assertEqual(first["sha256"], second["sha256"])
+
+        history = ReleaseHistory(self.asset.get_release_history_path("mod"))
+        self.assertEqual(history.entries("mod"), [first, second])
+        self.assertEqual(history.entries("rig"), [])
+        objects = list((history.history_dir / ".objects").iterdir())
+        self.assertEqual(len(objects), 1)
+        for entry in (first, second):
+            self.assertEqual(history.path(entry).read_bytes(), self.asset.version.read_bytes())
+        self.assertEqual(
+            self.asset.get_release("mod").read_bytes(), self.asset.version.read_bytes()
+        )
+        self.post.assert_called_with("asset_released", self.asset)
+
+    def test_history_points_to_object_without_links(self):
+        with mock.patch.object(mat, "_reflink", side_effect=unsupported), \
+                mock.patch.object(mat, "_hardlink", side_effect=unsupported):
+            entry = release(self.asset, "mod")
+        self.assertTrue(entry["file"].startswith(".objects/"))
+        history = ReleaseHistory(self.asset.get_release_history_path("mod"))
+        self.assertEqual(history.path(entry).read_bytes(), self.asset.version.read_bytes())
+
+    def test_missing_version(self):
+        self.asset.version.unlink()
+        with self.assertRaises(FileNotFoundError):
+            release(self.asset, "mod")
+        self.post.assert_not_called()
+
+    def test_entries_are_reread_after_append(self):
+        history = ReleaseHistory(self.asset.get_release_history_path("mod"))
+        history.history_dir.mkdir(parents=True)
+        self.assertEqual(history.entries(), [])
+        history.append({"dep": "mod", "timestamp": 1})
+        self.assertEqual(len(history.entries()), 1)
+        history.append({"dep": "rig", "timestamp": 2})
+        self.assertEqual([e["dep"] for e in history.entries()], ["mod", "rig"])
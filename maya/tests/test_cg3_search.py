@@ -0,0 +1,50 @@
+from cg3.file.search import AssetSearchIndex
+from cg3.test import TestCase
+
+
+class FakeAsset:
+    """Only what the index reads of an Asset."""
+
+    def __init__(self, kind, name, deps=()):
+        self.kind = kind
+        self.name = name
+        self.deps = list(deps)
+
+    def get_deps(self):
+        return self.deps
+
+
+class AssetSearchIndexTests(TestCase):
+    def setUp(self):
+        self.index = AssetSearchIndex([
+            FakeAsset("char", "bob", ["mod", "rig"]),
+            FakeAsset("char", "bobby", ["mod"]),
+            FakeAsset("prop", "chair", ["mod"]),
+            FakeAsset("prop", "robot", ["mod"]),
+            FakeAsset("set", "kitchen", ["asmbl"]),
+        ])
+
+    def test_ranking(self):
+        self.assertEqual(self.index.search("bob"), ["bob", "bobby", "robot"])
+        self.assertEqual(self.index.search("bo"), ["bob", "bobby", "robot"])
+
+    def test_typo_finds_name_before_kind(self):
+        results = self.index.search("chiar")
+        self.assertEqual(results[0], "chair")
+        self.assertNotIn("bob", results)
+
+    def test_short_query_matches_substrings(self):
+        self.assertEqual(self.index.search("o"), ["bob", "bobby", "robot"])
+        self.assertEqual(self.index.search("ch"), ["chair", "kitchen", "bob", "bobby"])
+
+    def test_kind_and_dep_match_after_names(self):
+        self.assertEqual(self.index.search("char"), ["chair", "bob", "bobby"])
+        self.assertEqual(self.index.search("bob rig"), ["bob"])
+
+    def test_add_and_remove(self):
+        self.index.add(FakeAsset("prop", "chairs", ["mod"]))
+        self.assertEqual(self.index.search("chair"), ["chair", "chairs"])
+        self.index.remove("chair")
+        self.index.add(FakeAsset("char", "bob", ["mod", "rig", "shade"]))
+        self.assertEqual(self.index.search("shade"), ["bob"])
+        self.assertEqual(len(self.index), 5)
@@ -0,0 +1,31 @@
+import pymel.core as pc
+
+from cg3.publish.modules.CollectGeoSetsMembers import CollectGeoSetsMembers
+from cg3.publish.snapshot import SceneSnapshot
+from cg3.test import TestCase
+
+
+class GeoSetMembersTests(TestCase):
+    def setUp(self):
+        self.cube = pc.polyCube(ch=False, n="chair")[0]
+        self.sphere = pc.polySphere(ch=False, n="lamp")[0]
+        pc.sets(self.cube, self.sphere.f[0:9], n="props_geo")
+
+    def test_component_members_keep_their_components(self):
+        members = SceneSnapshot().sets("*_geo")["props_geo"]
+        self.assertIn("chair", members)
+        # the faces, named by the shape or its transform
+        self.assertEqual([m for m in members if m.startswith("lamp")], [
+            m for m in members if m.startswith("lamp") and m.endswith(".f[0:9]")
+        ])
+        self.assertEqual(len(members), 2)
+
+    def test_collect_returns_components(self):
+        module = CollectGeoSetsMembers()
+        module.reset()
+        module.snapshot = SceneSnapshot()
+        items = module.collect()
+        self.assertIn(self.cube, items)
+        faces = [i for i in items if isinstance(i, pc.MeshFace)]
+        self.assertEqual(len(faces), 1)
+        self.assertEqual(len(faces[0]), 10)
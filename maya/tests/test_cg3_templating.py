@@ -0,0 +1,65 @@
+import random
+import re
+from pathlib import Path
+
+from cg3.file.templating import TemplateEngine, compile_find_replace
+from cg3.test import TestCase
+
+# overlapping finds: prefixes, suffixes and one contained in another
+FIND_REPLACE = [
+    ("ab", "X"), ("abc", "Y"), ("bc", "ab"), ("c", ""), ("##FPS##", "film")
+]
+
+
+def reference(text: bytes, find_replace) -> bytes:
+    """Single pass re.sub, longest find first."""
+    table = {f.encode(): r.encode() for f, r in reversed(find_replace)}
+    finds = sorted(table, key=len, reverse=True)
+    pattern = re.compile(b"|".join(re.escape(f) for f in finds))
+    return pattern.sub(lambda m: table[m.group(0)], text)
+
+
+def chunked(text: bytes, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class ReplacerTests(TestCase):
+    def setUp(self):
+        self.random = random.Random(3)
+        self.replacer = compile_find_replace(FIND_REPLACE)
+
+    def random_text(self, length: int) -> bytes:
+        return bytes(self.random.choice(b"abc#FPS ") for _ in range(length))
+
+    def test_single_pass(self):
+        # replaced text ('bc' -> 'ab') is not replaced again, the longest find wins
+        self.assertEqual(self.replacer.sub(b"abcbc ##FPS##"), b"Yab film")
+        self.assertEqual(compile_find_replace([]).sub(b"abc"), b"abc")
+
+    def test_equal_to_re_sub(self):
+        for _ in range(200):
+            text = self.random_text(self.random.randint(0, 200))
+            self.assertEqual(self.replacer.sub(text), reference(text, FIND_REPLACE))
+
+    def test_matches_spanning_chunks(self):
+        text = b"xx##FPS##abcab" * 5
+        expected = reference(text, FIND_REPLACE)
+        for size in range(1, 12):
+            self.assertEqual(b"".join(self.replacer.stream(chunked(text, size))), expected)
+        for _ in range(200):
+            text = self.random_text(self.random.randint(0, 300))
+            size = self.random.randint(1, 20)
+            self.assertEqual(
+                b"".join(self.replacer.stream(chunked(text, size))),
+                reference(text, FIND_REPLACE)
+            )
+
+    def test_render_to_file_streams_big_templates(self):
+        template = Path(self.get_temp_filename("workspace.mel"))
+        target = Path(self.get_temp_filename("out.mel"))
+        text = b"fps ##FPS##; " * 1000
+        template.write_bytes(text)
+        engine = TemplateEngine(max_cached_bytes=100, chunk_size=7)
+        engine.render_to_file(template, target, [("##FPS##", "film")])
+        self.assertEqual(target.read_bytes(), text.replace(b"##FPS##", b"film"))
+        self.assertEqual(engine.render(template, [("##FPS##", "pal")]), text.replace(b"##FPS##", b"pal"))
@@ -0,0 +1,82 @@
+import unittest
+
+from cg3.publish import topology
+from cg3.publish.topology import MeshData, components
+from cg3.test import TestCase
+
+np = topology.np
+
+CUBE_POINTS = [
+    (-1, -1, 1), (1, -1, 1), (-1, 1, 1), (1, 1, 1),
+    (-1, 1, -1), (1, 1, -1), (-1, -1, -1), (1, -1, -1)
+]
+# polyCube face order and winding
+CUBE_FACES = [
+    (0, 1, 3, 2), (2, 3, 5, 4), (4, 5, 7, 6), (6, 7, 1, 0), (1, 7, 5, 3), (6, 0, 2, 4)
+]
+
+
+def mesh(points=CUBE_POINTS, faces=CUBE_FACES) -> MeshData:
+    return MeshData(
+        "pCubeShape1",
+        np.array(points, dtype=np.float64).reshape(-1, 3),
+        np.array([len(f) for f in faces], dtype=np.int64),
+        np.array([v for f in faces for v in f], dtype=np.int64)
+    )
+
+
+def pairs(edges):
+    return sorted(tuple(int(v) for v in edge) for edge in edges)
+
+
+@unittest.skipUnless(topology.HAS_NUMPY, "NumPy is not available")
+class TopologyDetectorTests(TestCase):
+    def test_clean_cube(self):
+        cube = mesh()
+        self.assertEqual(len(topology.lamina_faces(cube)), 0)
+        self.assertEqual(len(topology.zero_area_faces(cube)), 0)
+        self.assertEqual(len(topology.zero_length_edges(cube)), 0)
+        self.assertEqual(len(topology.nonmanifold_edges(cube)), 0)
+
+    def test_lamina_face(self):
+        # same vertices as face 0, other start and winding
+        cube = mesh(faces=CUBE_FACES + [(3, 1, 0, 2)])
+        self.assertEqual(topology.lamina_faces(cube).tolist(), [0, 6])
+        # the extra face makes all its edges shared by three faces
+        self.assertEqual(pairs(topology.nonmanifold_edges(cube)), [(0, 1), (0, 2), (1, 3), (2, 3)])
+
+    def test_flipped_face(self):
+        faces = list(CUBE_FACES)
+        faces[0] = tuple(reversed(faces[0]))
+        self.assertEqual(
+            pairs(topology.nonmanifold_edges(mesh(faces=faces))), [(0, 1), (0, 2), (1, 3), (2, 3)]
+        )
+
+    def test_zero_length_edge_and_zero_area_face(self):
+        points = list(CUBE_POINTS) + [(1, 1, 1), (3, 3, 3)]
+        # a triangle collapsed to a line, one of its edges has no length
+        faces = CUBE_FACES + [(3, 8, 9)]
+        degenerate = mesh(points, faces)
+        self.assertEqual(pairs(topology.zero_length_edges(degenerate)), [(3, 8)])
+        self.assertEqual(topology.zero_area_faces(degenerate).tolist(), [6])
+
+    def test_empty_mesh(self):
+        empty = mesh(points=[], faces=[])
+        self.assertEqual(len(topology.lamina_faces(empty)), 0)
+        self.assertEqual(len(topology.zero_area_faces(empty)), 0)
+        self.assertEqual(len(topology.zero_length_edges(empty)), 0)
+        self.assertEqual(len(topology.nonmanifold_edges(empty)), 0)
+
+    def test_key_follows_content(self):
+        points = np.array(CUBE_POINTS, dtype=np.float64)
+        self.assertEqual(mesh().key, mesh().key)
+        points[0] += 0.1
+        self.assertNotEqual(mesh(points).key, mesh().key)
+
+
+class ComponentsTests(TestCase):
+    def test_ranges(self):
+        self.assertEqual(
+            components("pCube1", "f", [7, 1, 3, 2]), "pCube1.f[1:3] pCube1.f[7]"
+        )
+        self.assertEqual(components("pCube1", "e", []), "")